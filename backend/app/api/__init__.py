@@ -1,8 +1,8 @@
 
 from fastapi import APIRouter
+from ..config import settings
 from .ingestion import router as ingestion_router
 from .chat import router as chat_router
-# from .training import router as training_router
 
 router = APIRouter()
 
@@ -18,18 +18,24 @@ router.include_router(
     tags=["Chat Interface"]
 )
 
-# router.include_router(
-#     training_router, 
-#     prefix="/training", 
-#     tags=["Model Training"]
-# )
+if settings.ENABLE_LOCAL_LLM:
+    from .training import router as training_router
+    
+    router.include_router(
+        training_router, 
+        prefix="/training", 
+        tags=["Model Training"]
+    )
 
 @router.get("/")
 async def api_root():
+    endpoints = {
+        "ingestion": "/api/v1/ingestion/",
+        "chat": "/api/v1/chat/"
+    }
+    if settings.ENABLE_LOCAL_LLM:
+        endpoints["training"] = "/api/v1/training/"
     return {
         "message": "Docet API v1",
-        "endpoints": {
-            "ingestion": "/api/v1/ingestion/",
-            "chat": "/api/v1/chat/"
-        }
+        "endpoints": endpoints
     }
\ No newline at end of file
@@ -1,9 +1,11 @@
 """Chat API endpoints for RAG-powered conversations."""
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import asyncio
+import json
 
 from ..chat.service import ChatService
 from ..rag.service import get_rag_service
@@ -118,6 +120,63 @@ async def send_message(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/message/stream")
+async def send_message_stream(request: ChatRequest):
+    """
+    Send a message and stream the AI response as Server-Sent Events.
+    
+    Emits one `delta` event per generated text fragment, followed by a `done`
+    event carrying the sources and context metadata.
+    """
+    if not request.chatbot_id or len(request.chatbot_id.strip()) == 0:
+        raise HTTPException(status_code=400, detail="chatbot_id is required")
+    
+    session_key = f"{request.chatbot_id}:{request.session_id}" if request.session_id else f"{request.chatbot_id}:{_generate_session_id()}"
+    
+    if session_key not in session_storage:
+        session_storage[session_key] = ChatSession(
+            session_id=session_key,
+            created_at=_get_current_timestamp(),
+            messages=[],
+            metadata={"chatbot_id": request.chatbot_id}
+        )
+    
+    session = session_storage[session_key]
+    session.messages.append(ChatMessage(
+        role="user",
+        content=request.message,
+        metadata=request.context
+    ))
+    
+    async def event_stream():
+        rag_service = get_rag_service()
+        text_parts = []
+        try:
+            async for event in rag_service.generate_response_stream(
+                chatbot_id=request.chatbot_id,
+                query=request.message,
+                session_id=session_key
+            ):
+                if event["type"] == "delta":
+                    text_parts.append(event["text"])
+                else:
+                    session.messages.append(ChatMessage(
+                        role="assistant",
+                        content="".join(text_parts),
+                        metadata={
+                            "sources": event.get("sources", []),
+                            "context_used": event.get("context_used", False),
+                            "context_chunks_count": event.get("context_chunks_count", 0)
+                        }
+                    ))
+                    event = {**event, "chatbot_id": request.chatbot_id}
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.get("/sessions")
 async def list_chat_sessions(chatbot_id: Optional[str] = None):
     """List all chat sessions, optionally filtered by chatbot."""
@@ -9,6 +9,7 @@ import uuid
 from ..connectors.ingestion_service import get_ingestion_service
 from ..vector.chroma_service import get_chroma_service
 from ..rag.service import get_rag_service
+from ..rag.query_cache import invalidate_chatbot_caches
 
 router = APIRouter()
 
@@ -104,7 +105,7 @@ async def ingest_documentation(request: IngestionRequest):
         
         # Initialize vector service and create collection for chatbot
         vector_service = get_chroma_service()
-        vector_service.create_chatbot_collection(request.chatbot_id)
+        await asyncio.to_thread(vector_service.create_chatbot_collection, request.chatbot_id)
         
         # Use enhanced ingestion service
         ingestion_service = get_ingestion_service()
@@ -156,7 +157,7 @@ async def list_chatbots():
     """List all chatbots with their collections."""
     try:
         vector_service = get_chroma_service()
-        collections = vector_service.list_chatbot_collections()
+        collections = await asyncio.to_thread(vector_service.list_chatbot_collections)
         return {
             "chatbots": collections,
             "total": len(collections)
@@ -181,7 +182,7 @@ async def test_chatbot_retrieval(chatbot_id: str, query: str):
     """Test document retrieval for a chatbot (debugging endpoint)."""
     try:
         rag_service = get_rag_service()
-        results = rag_service.test_retrieval(chatbot_id, query)
+        results = await asyncio.to_thread(rag_service.test_retrieval, chatbot_id, query)
         return results
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -192,7 +193,8 @@ async def delete_chatbot(chatbot_id: str):
     """Delete a chatbot and all its data."""
     try:
         vector_service = get_chroma_service()
-        success = vector_service.delete_chatbot_collection(chatbot_id)
+        success = await asyncio.to_thread(vector_service.delete_chatbot_collection, chatbot_id)
+        invalidate_chatbot_caches(chatbot_id)
         
         if success:
             return {"message": f"Chatbot {chatbot_id} deleted successfully"}
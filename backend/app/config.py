@@ -10,6 +10,8 @@ load_dotenv()
 class Settings(BaseSettings):
     
     APP_NAME: str = "Docet"
+    # "dev" together with DEBUG turns on autoreload in python -m app.main
+    ENV: str = "production"
     DEBUG: bool = True
     HOST: str = "127.0.0.1"
     PORT: int = 8000
@@ -20,8 +22,20 @@ class Settings(BaseSettings):
     
     VECTOR_DB_PATH: str = "./data/vector_db"
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    # Directory of an int8 ONNX export (python -m app.vector.onnx_embedding <dir>); empty uses FP32 torch
+    EMBEDDING_ONNX_PATH: str = ""
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
+    # Vectors per collection.add / collection.query call
+    CHROMA_INGEST_BATCH: int = 512
+    
+    # Serve the local LLM and fine-tuning endpoints under /api/v1/training (needs torch, transformers, peft)
+    ENABLE_LOCAL_LLM: bool = False
+    LOCAL_LLM_COMPILE_MODE: str = "reduce-overhead"
+    
+    MAX_CONCURRENT_LLM: int = 8
+    # Load the embedding model and every chatbot's vector index before serving
+    WARM_UP_ON_STARTUP: bool = True
     
     GOOGLE_CLOUD_PROJECT: str = ""
     GOOGLE_CLOUD_STORAGE_BUCKET: str = ""
@@ -9,6 +9,7 @@ from .registry import ConnectorRegistry
 from ..models import Document
 from ..vector.chroma_service import get_chroma_service
 from ..ingestion.processor import DocumentProcessor
+from ..rag.query_cache import invalidate_chatbot_caches
 
 logger = logging.getLogger(__name__)
 
@@ -226,6 +227,7 @@ class IngestionService:
         if force_reingestion:
             # Clear existing documents for this chatbot
             await self.vector_service.clear_chatbot_data(chatbot_id)
+            invalidate_chatbot_caches(chatbot_id)
         
         # Process documents into chunks
         processor = DocumentProcessor()
@@ -254,7 +256,9 @@ class IngestionService:
         
         # Store all chunks at once (more efficient)
         try:
-            success = self.vector_service.add_documents(chatbot_id, all_chunks)
+            success = await self.vector_service.add_documents_async(chatbot_id, all_chunks)
+            # Cached search results no longer reflect the collection
+            invalidate_chatbot_caches(chatbot_id)
             if success:
                 chunks_stored = len(all_chunks)
             else:
@@ -1,9 +1,46 @@
 
 from typing import List, Dict, Any
+from bisect import bisect_left
 import re
 from ..models import Document, DocumentChunk
 
 
+_SENTENCE_BREAK = re.compile(r'[.!?]\s+')
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+_WHITESPACE = re.compile(r'\s')
+
+
+class _BreakIndex:
+    """Candidate break positions found in one pass over the text, queried per chunk window."""
+    
+    def __init__(self, text: str):
+        sentence_spans = [m.span() for m in _SENTENCE_BREAK.finditer(text)]
+        self.sentence_starts = [s for s, _ in sentence_spans]
+        self.sentence_ends = [e for _, e in sentence_spans]
+        
+        self.text = text
+        self.whitespace = [m.start() for m in _WHITESPACE.finditer(text)]
+    
+    def find(self, start: int, end: int) -> int:
+        # First sentence ending in the window; it needs at least one whitespace char before end
+        i = bisect_left(self.sentence_starts, start)
+        if i < len(self.sentence_starts) and self.sentence_starts[i] + 1 < end:
+            return min(self.sentence_ends[i], end)
+        
+        # A paragraph run can straddle the window edges, so match it within the window bounds
+        # (pos/endpos search without copying a slice)
+        paragraph = _PARAGRAPH_BREAK.search(self.text, start, end)
+        if paragraph:
+            return paragraph.end()
+        
+        # Otherwise the last whitespace in the window
+        i = bisect_left(self.whitespace, end) - 1
+        if i >= 0 and self.whitespace[i] >= start:
+            return self.whitespace[i]
+        
+        return end
+
+
 class DocumentProcessor:
     
     def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
@@ -39,15 +76,10 @@ class DocumentProcessor:
                 content=chunk_text,
                 chunk_index=i,
                 start_char=max(0, start_char),
-                end_char=min(len(content), end_char),
-                metadata={
-                    **document.metadata,
-                    'document_title': document.title,
-                    'document_url': document.url,
-                    'document_type': document.doc_type,
-                    'chunk_size': len(chunk_text)
-                }
+                end_char=min(len(content), end_char)
             )
+            # Document-level fields are read through chunk.document, not copied onto every chunk
+            chunk._document = document
             chunks.append(chunk)
         
         return chunks
@@ -66,6 +98,7 @@ class DocumentProcessor:
             return [text]
         
         chunks = []
+        breaks = _BreakIndex(text)
         start = 0
         
         while start < len(text):
@@ -73,7 +106,7 @@ class DocumentProcessor:
             
             if start > 0 and end < len(text):
                 search_start = max(start, end - self.chunk_overlap)
-                sentence_break = self._find_sentence_break(text, search_start, end)
+                sentence_break = breaks.find(search_start, end)
                 
                 if sentence_break > start:
                     end = sentence_break
@@ -85,25 +118,10 @@ class DocumentProcessor:
             if end >= len(text):
                 break
             
+            previous_start = start
             start = end - self.chunk_overlap
             
-            if start <= chunks and len(chunks) > 0:
+            if start <= previous_start:
                 start = end
         
         return chunks
-    
-    def _find_sentence_break(self, text: str, start: int, end: int) -> int:
-        sentence_endings = r'[.!?]\s+'
-        
-        for match in re.finditer(sentence_endings, text[start:end]):
-            return start + match.end()
-        
-        paragraph_breaks = r'\n\s*\n'
-        for match in re.finditer(paragraph_breaks, text[start:end]):
-            return start + match.end()
-        
-        for i in range(end - 1, start - 1, -1):
-            if text[i].isspace():
-                return i
-        
-        return end
\ No newline at end of file
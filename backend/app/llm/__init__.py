@@ -1,4 +1,4 @@
 
-# from .local_service import LocalLLMService, local_llm_service
+from .local_service import LocalLLMService, local_llm_service
 
-# __all__ = ['LocalLLMService', 'local_llm_service']
\ No newline at end of file
+__all__ = ['LocalLLMService', 'local_llm_service']
@@ -1,15 +1,20 @@
 
 import os
 import json
+import asyncio
+import weakref
 import logging
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, AsyncIterator
 import google.genai as genai
+from cachetools import LRUCache
 
 from ..config import settings
-from ..tools import get_all_tool_functions, get_all_tool_declarations, get_chatbot_tool_declarations, get_tool_function, is_tool_allowed_for_chatbot
+from ..tools import get_all_tool_functions, get_all_tool_declarations, get_chatbot_tool_declarations, get_tool_function, tool_accepts_chatbot_id, is_async_tool, is_tool_allowed_for_chatbot
 
 logger = logging.getLogger(__name__)
 
+MAX_CONVERSATION_SESSIONS = 10_000
+
 
 class GeminiLLMService:
     
@@ -18,7 +23,10 @@ class GeminiLLMService:
         self.client = None
         self.api_key = None
         self.tools = []
-        self.conversation_history = {}
+        # Bounded so abandoned sessions are evicted instead of leaking
+        self.conversation_history = LRUCache(maxsize=MAX_CONVERSATION_SESSIONS)
+        # Weak values so a session's lock disappears once no turn is holding it
+        self._session_locks = weakref.WeakValueDictionary()
         self._setup_client()
     
     def _setup_client(self):
@@ -65,6 +73,42 @@ class GeminiLLMService:
         if len(self.conversation_history[session_id]) > 10:
             self.conversation_history[session_id] = self.conversation_history[session_id][-10:]
     
+    def _get_session_lock(self, session_id: str) -> asyncio.Lock:
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._session_locks[session_id] = lock
+        return lock
+    
+    async def _execute_function_call(self, function_name: str, function_args: Dict[str, Any], chatbot_id: str) -> Any:
+        if not is_tool_allowed_for_chatbot(function_name, chatbot_id):
+            return f"Tool '{function_name}' is not available for chatbot '{chatbot_id}'"
+        
+        tool_function = get_tool_function(function_name)
+        if not tool_function:
+            return f"Unknown function: {function_name}"
+        
+        if tool_accepts_chatbot_id(function_name):
+            # Copy only here: the args mapping belongs to the model turn kept in history
+            function_args = {**function_args, "chatbot_id": chatbot_id}
+        
+        # Keep blocking tool I/O (vector search, HTTP) off the event loop
+        if is_async_tool(function_name):
+            return await tool_function(**function_args)
+        return await asyncio.to_thread(tool_function, **function_args)
+    
+    def _build_function_response(self, function_name: str, result: Any) -> genai.types.Content:
+        return genai.types.Content(
+            parts=[
+                genai.types.Part(
+                    function_response=genai.types.FunctionResponse(
+                        name=function_name,
+                        response={"result": result}
+                    )
+                )
+            ]
+        )
+    
     async def generate_response(
         self, 
         prompt: str, 
@@ -78,108 +122,173 @@ class GeminiLLMService:
         if not self.client:
             raise Exception("Gemini client not initialized. Please set GOOGLE_AI_STUDIO_API_KEY environment variable.")
         
-        try:
-            current_message = genai.types.Content(parts=[genai.types.Part(text=prompt)])
-            
-            conversation_history = self._get_conversation_history(session_id)
-            
-            conversation_contents = conversation_history + [current_message]
-            
-            chatbot_tools = self._get_tools_for_chatbot(chatbot_id)
-            
-            logger.info(f"Generating response for session {session_id} with {len(conversation_history)} previous messages and {len(chatbot_tools[0].function_declarations) if chatbot_tools else 0} tools")
-            
-            response = await self.client.aio.models.generate_content(
-                model=self.model_name,
-                contents=conversation_contents,
-                config=genai.types.GenerateContentConfig(
-                    temperature=temperature,
-                    max_output_tokens=max_output_tokens,
-                    tools=chatbot_tools
+        async with self._get_session_lock(session_id):
+            try:
+                current_message = genai.types.Content(parts=[genai.types.Part(text=prompt)])
+                
+                conversation_history = self._get_conversation_history(session_id)
+                
+                conversation_contents = conversation_history + [current_message]
+                
+                chatbot_tools = self._get_tools_for_chatbot(chatbot_id)
+                
+                logger.info(f"Generating response for session {session_id} with {len(conversation_history)} previous messages and {len(chatbot_tools[0].function_declarations) if chatbot_tools else 0} tools")
+                
+                response = await self.client.aio.models.generate_content(
+                    model=self.model_name,
+                    contents=conversation_contents,
+                    config=genai.types.GenerateContentConfig(
+                        temperature=temperature,
+                        max_output_tokens=max_output_tokens,
+                        tools=chatbot_tools
+                    )
                 )
-            )
-            
-            self._add_to_conversation_history(session_id, current_message)
-            
-            if response.candidates and response.candidates[0].content:
-                candidate = response.candidates[0]
-                
-                for part in candidate.content.parts:
-                    if part.function_call:
-                        function_name = part.function_call.name
-                        function_args = dict(part.function_call.args) if part.function_call.args else {}
-                        
-                        logger.info(f"Gemini requested function call: {function_name} with args: {function_args}")
+                
+                self._add_to_conversation_history(session_id, current_message)
+                
+                if response.candidates and response.candidates[0].content:
+                    candidate = response.candidates[0]
+                    
+                    for part in candidate.content.parts:
+                        if part.function_call:
+                            function_name = part.function_call.name
+                            function_args = part.function_call.args or {}
+                            
+                            logger.info(f"Gemini requested function call: {function_name} with args: {function_args}")
 
-                        if return_function_call:
-                            return {
-                                "action": "function_call",
-                                "function_name": function_name,
-                                "function_args": function_args
-                            }
+                            if return_function_call:
+                                return {
+                                    "action": "function_call",
+                                    "function_name": function_name,
+                                    "function_args": function_args
+                                }
 
-                        if not is_tool_allowed_for_chatbot(function_name, chatbot_id):
-                            result = f"Tool '{function_name}' is not available for chatbot '{chatbot_id}'"
-                        else:
-                            tool_function = get_tool_function(function_name)
-                            if tool_function:
-                                func_signature = tool_function.__code__.co_varnames
-                                if 'chatbot_id' in func_signature:
-                                    function_args["chatbot_id"] = chatbot_id
+                            result = await self._execute_function_call(function_name, function_args, chatbot_id)
+                            function_response = self._build_function_response(function_name, result)
 
-                                result = tool_function(**function_args)
-                            else:
-                                result = f"Unknown function: {function_name}"
+                            self._add_to_conversation_history(session_id, candidate.content)
+                            self._add_to_conversation_history(session_id, function_response)
 
-                        function_response = genai.types.Content(
-                            parts=[
-                                genai.types.Part(
-                                    function_response=genai.types.FunctionResponse(
-                                        name=function_name,
-                                        response={"result": result}
-                                    )
+                            # Only one round of function calling is handled, so the follow-up
+                            # reuses the contents already built and omits the tool declarations
+                            final_response = await self.client.aio.models.generate_content(
+                                model=self.model_name,
+                                contents=conversation_contents + [candidate.content, function_response],
+                                config=genai.types.GenerateContentConfig(
+                                    temperature=temperature,
+                                    max_output_tokens=max_output_tokens
                                 )
-                            ]
-                        )
-
-                        self._add_to_conversation_history(session_id, candidate.content)
-                        self._add_to_conversation_history(session_id, function_response)
-
-                        final_response = await self.client.aio.models.generate_content(
-                            model=self.model_name,
-                            contents=self._get_conversation_history(session_id),
-                            config=genai.types.GenerateContentConfig(
-                                temperature=temperature,
-                                max_output_tokens=max_output_tokens,
-                                tools=chatbot_tools
                             )
-                        )
 
-                        if (final_response.candidates and 
-                            final_response.candidates[0].content and 
-                            final_response.candidates[0].content.parts):
-                            final_text = final_response.candidates[0].content.parts[0].text.strip()
-                            self._add_to_conversation_history(
-                                session_id, 
-                                genai.types.Content(parts=[genai.types.Part(text=final_text)])
-                            )
-                            return final_text
-                        else:
-                            return f"Function executed: {result}"
+                            if (final_response.candidates and 
+                                final_response.candidates[0].content and 
+                                final_response.candidates[0].content.parts):
+                                final_text = final_response.candidates[0].content.parts[0].text.strip()
+                                self._add_to_conversation_history(
+                                    session_id, 
+                                    genai.types.Content(parts=[genai.types.Part(text=final_text)])
+                                )
+                                return final_text
+                            else:
+                                return f"Function executed: {result}"
+                    
+                    if candidate.content.parts and candidate.content.parts[0].text:
+                        response_text = candidate.content.parts[0].text.strip()
+                        self._add_to_conversation_history(
+                            session_id,
+                            genai.types.Content(parts=[genai.types.Part(text=response_text)])
+                        )
+                        return response_text
+                
+                return "I apologize, but I couldn't generate a response. Please try rephrasing your question."
+                
+            except Exception as e:
+                logger.error(f"Failed to generate response with Gemini: {str(e)}")
+                return "I apologize, but I'm unable to generate a response at the moment. Please try again."
+    
+    async def stream_response(
+        self,
+        prompt: str,
+        chatbot_id: str = "default",
+        session_id: str = "default",
+        temperature: float = 0.7,
+        max_output_tokens: int = 2048
+    ) -> AsyncIterator[str]:
+        if not self.client:
+            raise Exception("Gemini client not initialized. Please set GOOGLE_AI_STUDIO_API_KEY environment variable.")
+        
+        async with self._get_session_lock(session_id):
+            try:
+                current_message = genai.types.Content(parts=[genai.types.Part(text=prompt)])
+                conversation_contents = self._get_conversation_history(session_id) + [current_message]
+                chatbot_tools = self._get_tools_for_chatbot(chatbot_id)
+                
+                logger.info(f"Streaming response for session {session_id} with {len(conversation_contents) - 1} previous messages")
+                
+                stream = await self.client.aio.models.generate_content_stream(
+                    model=self.model_name,
+                    contents=conversation_contents,
+                    config=genai.types.GenerateContentConfig(
+                        temperature=temperature,
+                        max_output_tokens=max_output_tokens,
+                        tools=chatbot_tools
+                    )
+                )
+                
+                self._add_to_conversation_history(session_id, current_message)
+                
+                text_parts = []
+                function_call_content = None
+                function_call = None
+                async for chunk in stream:
+                    if not chunk.candidates or not chunk.candidates[0].content:
+                        continue
+                    for part in chunk.candidates[0].content.parts or []:
+                        if part.function_call:
+                            function_call_content = chunk.candidates[0].content
+                            function_call = part.function_call
+                            break
+                        if part.text:
+                            text_parts.append(part.text)
+                            yield part.text
+                    if function_call:
+                        break
                 
-                if candidate.content.parts and candidate.content.parts[0].text:
-                    response_text = candidate.content.parts[0].text.strip()
+                if function_call:
+                    function_name = function_call.name
+                    function_args = function_call.args or {}
+                    logger.info(f"Gemini requested function call: {function_name} with args: {function_args}")
+                    
+                    result = await self._execute_function_call(function_name, function_args, chatbot_id)
+                    function_response = self._build_function_response(function_name, result)
+                    
+                    self._add_to_conversation_history(session_id, function_call_content)
+                    self._add_to_conversation_history(session_id, function_response)
+                    
+                    final_stream = await self.client.aio.models.generate_content_stream(
+                        model=self.model_name,
+                        contents=conversation_contents + [function_call_content, function_response],
+                        config=genai.types.GenerateContentConfig(
+                            temperature=temperature,
+                            max_output_tokens=max_output_tokens
+                        )
+                    )
+                    async for chunk in final_stream:
+                        if chunk.text:
+                            text_parts.append(chunk.text)
+                            yield chunk.text
+                
+                if text_parts:
                     self._add_to_conversation_history(
                         session_id,
-                        genai.types.Content(parts=[genai.types.Part(text=response_text)])
+                        genai.types.Content(parts=[genai.types.Part(text="".join(text_parts).strip())])
                     )
-                    return response_text
-            
-            return "I apologize, but I couldn't generate a response. Please try rephrasing your question."
-            
-        except Exception as e:
-            logger.error(f"Failed to generate response with Gemini: {str(e)}")
-            return "I apologize, but I'm unable to generate a response at the moment. Please try again."
+                else:
+                    yield "I apologize, but I couldn't generate a response. Please try rephrasing your question."
+                
+            except Exception as e:
+                logger.error(f"Failed to stream response with Gemini: {str(e)}")
+                yield "I apologize, but I'm unable to generate a response at the moment. Please try again."
     
     async def get_model_info(self) -> Dict[str, Any]:
         return {
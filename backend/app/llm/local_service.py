@@ -1,290 +1,565 @@
 
-# import os
-# import json
-# import torch
-# from typing import List, Dict, Any, Optional
-# from transformers import (
-#     AutoTokenizer, 
-#     AutoModelForCausalLM, 
-#     AutoModelForSeq2SeqLM,
-#     pipeline, 
-#     TrainingArguments, 
-#     Trainer,
-#     DataCollatorForLanguageModeling
-# )
-# from peft import LoraConfig, get_peft_model, TaskType
-# from datasets import Dataset
-# import logging
+import os
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple, TYPE_CHECKING
+import logging
 
-# from ..config import settings
+from ..config import settings
 
-# logger = logging.getLogger(__name__)
+# torch, transformers, peft and datasets are imported on first use so that importing this
+# module (and app startup) does not pay for them
+if TYPE_CHECKING:
+    from datasets import Dataset
 
+logger = logging.getLogger(__name__)
 
-# class LocalLLMService:
+# Micro-batching of concurrent generate_response calls
+BATCH_WINDOW_SECONDS = 0.01
+MAX_BATCH_SIZE = 8
+
+# Per-session KV caches for multi-turn generation
+MAX_CACHED_SESSIONS = 128
+SESSION_CACHE_TTL_SECONDS = 30 * 60
+
+# How long a fine-tuned-model probe result is reused
+FINETUNED_CHECK_TTL_SECONDS = 5.0
+
+# Fixed parts of the fine-tuning example template
+TRAINING_SNIPPET_LENGTH = 500
+TRAINING_SYSTEM_PREFIX = "<|system|>You are a helpful AI assistant that answers questions about "
+TRAINING_SYSTEM_SUFFIX = " documentation. Provide accurate and helpful responses based on the documentation.<|endoftext|>\n"
+TRAINING_USER_TURN = "<|user|>What is this documentation about?<|endoftext|>\n"
+
+# Generation settings per model family (see _model_family)
+FAMILY_GENERATION_KWARGS: Dict[str, Dict[str, Any]] = {
+    "t5": {"max_length": 80, "repetition_penalty": 1.5, "early_stopping": True},
+    "qwen": {"max_new_tokens": 80, "repetition_penalty": 1.3},
+    "phi": {"max_new_tokens": 100, "repetition_penalty": 1.2},
+    "dialo": {"max_new_tokens": 50},
+    "other": {"max_new_tokens": 50},
+}
+
+
+def _model_family(model_name: str) -> str:
+    name = model_name.lower()
+    if "t5" in name or "flan" in name:
+        return "t5"
+    if "qwen" in name:
+        return "qwen"
+    if "phi" in name:
+        return "phi"
+    if "dialogpt" in name:
+        return "dialo"
+    return "other"
+
+
+class LocalLLMService:
     
-#     def __init__(self, model_name: str = "Qwen/Qwen2-0.5B-Instruct"):
-#         self.model_name = model_name
-#         self.model_path = "./data/models/fine_tuned"
-#         self.model = None
-#         self.tokenizer = None
-#         self.pipeline = None
-#         self.mock_mode = True
-        
-#         os.makedirs(self.model_path, exist_ok=True)
+    def __init__(self, model_name: str = "Qwen/Qwen2-0.5B-Instruct"):
+        self.model_name = model_name
+        self._family = _model_family(model_name)
+        self.model_path = "./data/models/fine_tuned"
+        self.model = None
+        self.tokenizer = None
+        self.mock_mode = True
+        self.compile_model = True
+        self.compile_mode = settings.LOCAL_LLM_COMPILE_MODE
+        self._inference_optimized = False
+        self._batch_queue = None
+        self._batch_worker = None
+        self._torch = None
+        self._dtype = None
+        self._phi_prefix_ids: List[int] = []
+        self._phi_suffix_ids: List[int] = []
+        self._kv_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._ft_cache: Tuple[float, bool] = (float("-inf"), False)
+        self._generation_defaults: Dict[str, Any] = {}
+        self._prompt_ids = {
+            "phi": self._phi_prompt_ids,
+            "dialo": self._dialo_prompt_ids,
+        }.get(self._family, self._plain_prompt_ids)
     
-#     async def load_model(self, use_fine_tuned: bool = True):
+    async def load_model(self, use_fine_tuned: bool = True, for_training: bool = False):
         
-#         self.mock_mode = False
+        self.mock_mode = False
         
-#         try:
-#             if use_fine_tuned and os.path.exists(os.path.join(self.model_path, "config.json")):
-#                 logger.info("Loading fine-tuned model...")
-#                 model_path = self.model_path
-#             else:
-#                 logger.info(f"Loading base model: {self.model_name}")
-#                 model_path = self.model_name
+        try:
+            torch = self._import_torch()
+            from transformers import AutoTokenizer, AutoModelForCausalLM, AutoModelForSeq2SeqLM
             
-#             self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+            if use_fine_tuned and self._has_finetuned():
+                logger.info("Loading fine-tuned model...")
+                model_path = self.model_path
+                # Everything is on disk, so skip the hub revision probes for these loads only
+                local_files_only = True
+                # Checkpoints saved before the switch to safetensors only have .bin weights
+                use_safetensors = any(name.endswith(".safetensors") for name in os.listdir(model_path))
+            else:
+                logger.info(f"Loading base model: {self.model_name}")
+                model_path = self.model_name
+                local_files_only = False
+                use_safetensors = True
             
-#             if "t5" in self.model_name.lower():
-#                 self.model = AutoModelForSeq2SeqLM.from_pretrained(
-#                     model_path,
-#                     torch_dtype=torch.float32,
-#                     device_map="cpu",
-#                     low_cpu_mem_usage=True
-#                 )
-#                 pipeline_task = "text2text-generation"
-#             else:
-#                 self.model = AutoModelForCausalLM.from_pretrained(
-#                     model_path,
-#                     torch_dtype=torch.float32,
-#                     device_map="cpu",
-#                     low_cpu_mem_usage=True
-#                 )
-#                 pipeline_task = "text-generation"
+            self.tokenizer = AutoTokenizer.from_pretrained(model_path, use_fast=True, local_files_only=local_files_only)
             
-#             if self.tokenizer.pad_token is None:
-#                 self.tokenizer.pad_token = self.tokenizer.eos_token
+            # BF16 halves weight bandwidth on CPUs with native support; training keeps FP32 master weights
+            self._dtype = torch.bfloat16 if not for_training and self._cpu_supports_bf16() else torch.float32
             
-#             self.pipeline = pipeline(
-#                 pipeline_task,
-#                 model=self.model,
-#                 tokenizer=self.tokenizer,
-#                 device_map="cpu"
-#             )
+            if self._family == "t5":
+                self.model = AutoModelForSeq2SeqLM.from_pretrained(
+                    model_path,
+                    torch_dtype=self._dtype,
+                    device_map="cpu",
+                    low_cpu_mem_usage=True,
+                    use_safetensors=use_safetensors,
+                    local_files_only=local_files_only
+                )
+            else:
+                self.model = AutoModelForCausalLM.from_pretrained(
+                    model_path,
+                    torch_dtype=self._dtype,
+                    device_map="cpu",
+                    low_cpu_mem_usage=True,
+                    use_safetensors=use_safetensors,
+                    local_files_only=local_files_only
+                )
             
-#             logger.info(f"Model {self.model_name} loaded successfully!")
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
             
-#         except Exception as e:
-#             logger.error(f"Failed to load model: {e}")
-#             self.mock_mode = True
-#             raise
-    
-#     async def generate_response(
-#         self, 
-#         prompt: str, 
-#         max_length: int = 512,
-#         temperature: float = 0.7,
-#         do_sample: bool = True
-#     ) -> str:
-        
-#         if self.mock_mode:
-#             return f"Mock response to: {prompt[:50]}... [Enable real model in /api/v1/training/model/load]"
-        
-#         if self.pipeline is None:
-#             await self.load_model()
-        
-#         try:
-#             if "t5" in self.model_name.lower() or "flan" in self.model_name.lower():
-#                 response = self.pipeline(
-#                     prompt,
-#                     max_length=80,
-#                     temperature=temperature,
-#                     do_sample=do_sample,
-#                     num_return_sequences=1,
-#                     truncation=True,
-#                     repetition_penalty=1.5,
-#                     early_stopping=True
-#                 )
-#                 generated_text = response[0]['generated_text'].strip()
-#             elif "qwen" in self.model_name.lower():
-#                 response = self.pipeline(
-#                     prompt,
-#                     max_new_tokens=80,
-#                     temperature=temperature,
-#                     do_sample=do_sample,
-#                     pad_token_id=self.tokenizer.eos_token_id,
-#                     eos_token_id=self.tokenizer.eos_token_id,
-#                     num_return_sequences=1,
-#                     truncation=True,
-#                     repetition_penalty=1.3
-#                 )
-                
-#                 generated_text = response[0]['generated_text']
-#                 if generated_text.startswith(prompt):
-#                     generated_text = generated_text[len(prompt):].strip()
-#             elif "phi" in self.model_name.lower():
-#                 messages = [{"role": "user", "content": prompt}]
-                
-#                 if hasattr(self.tokenizer, 'apply_chat_template'):
-#                     formatted_prompt = self.tokenizer.apply_chat_template(
-#                         messages, 
-#                         tokenize=False, 
-#                         add_generation_prompt=True
-#                     )
-#                 else:
-#                     formatted_prompt = f"<|user|>\n{prompt}<|end|>\n<|assistant|>\n"
-                
-#                 response = self.pipeline(
-#                     formatted_prompt,
-#                     max_new_tokens=100,
-#                     temperature=temperature,
-#                     do_sample=do_sample,
-#                     pad_token_id=self.tokenizer.eos_token_id,
-#                     eos_token_id=self.tokenizer.eos_token_id,
-#                     num_return_sequences=1,
-#                     truncation=True,
-#                     repetition_penalty=1.2
-#                 )
-                
-#                 generated_text = response[0]['generated_text']
-#                 if formatted_prompt in generated_text:
-#                     generated_text = generated_text[len(formatted_prompt):].strip()
-#             else:
-#                 if "DialoGPT" in self.model_name:
-#                     conversation_prompt = f"Human: {prompt}\nBot:"
-#                 else:
-#                     conversation_prompt = prompt
-                
-#                 response = self.pipeline(
-#                     conversation_prompt,
-#                     max_new_tokens=50,
-#                     temperature=temperature,
-#                     do_sample=do_sample,
-#                     pad_token_id=self.tokenizer.eos_token_id,
-#                     eos_token_id=self.tokenizer.eos_token_id,
-#                     num_return_sequences=1,
-#                     truncation=True
-#                 )
-#                 generated_text = response[0]['generated_text']
-                
-#                 if "DialoGPT" in self.model_name:
-#                     if "Bot:" in generated_text:
-#                         generated_text = generated_text.split("Bot:")[-1].strip()
-#                 else:
-#                     if generated_text.startswith(conversation_prompt):
-#                         generated_text = generated_text[len(conversation_prompt):].strip()
+            self._generation_defaults = {"num_return_sequences": 1, **FAMILY_GENERATION_KWARGS[self._family]}
+            if self._family != "t5":
+                eos_token_id = self.tokenizer.eos_token_id
+                self._generation_defaults.update(pad_token_id=eos_token_id, eos_token_id=eos_token_id)
+            
+            if not for_training and not self.model.config.is_encoder_decoder:
+                # Batched decoder-only generation needs prompts aligned on the right
+                self.tokenizer.padding_side = "left"
             
-#             return generated_text
+            if self._dtype == torch.bfloat16:
+                # Keep the output projection in FP32 for sampling quality, unless it shares
+                # its weight with the input embeddings
+                if hasattr(self.model, "lm_head") and not getattr(self.model.config, "tie_word_embeddings", False):
+                    self.model.lm_head.to(torch.float32)
+                    self.model.lm_head.register_forward_pre_hook(lambda module, args: tuple(arg.float() for arg in args))
+            elif not for_training:
+                # Without BF16 support, INT8 dynamic quantization of the Linear layers; lm_head
+                # stays FP32 for sampling quality
+                linear_layers = {
+                    name for name, module in self.model.named_modules()
+                    if isinstance(module, torch.nn.Linear) and "lm_head" not in name
+                }
+                self.model = torch.quantization.quantize_dynamic(self.model, linear_layers, dtype=torch.qint8)
             
-#         except Exception as e:
-#             logger.error(f"Failed to generate response: {str(e)}")
-#             return "I apologize, but I'm unable to generate a response at the moment."
+            if not for_training:
+                if self.compile_model and hasattr(torch, "compile"):
+                    # Compile forward only so the model keeps its HF class for generate
+                    self.model.forward = torch.compile(self.model.forward, mode=self.compile_mode, dynamic=True)
+            self._inference_optimized = not for_training
+            
+            if not for_training:
+                self.model.eval()
+                if self._family == "phi":
+                    self._cache_prompt_template()
+            
+            if self.compile_model and hasattr(torch, "compile") and not for_training:
+                # Pay the compilation cost here instead of on the first user request
+                with torch.inference_mode():
+                    self.model.generate(**self.tokenizer("warmup", return_tensors="pt"), max_new_tokens=1)
+            
+            logger.info(f"Model {self.model_name} loaded successfully!")
+            
+        except Exception as e:
+            logger.error(f"Failed to load model: {e}")
+            self.mock_mode = True
+            raise
+    
+    def _has_finetuned(self) -> bool:
+        now = time.monotonic()
+        checked_at, available = self._ft_cache
+        if now - checked_at < FINETUNED_CHECK_TTL_SECONDS:
+            return available
+        
+        available = Path(self.model_path, "config.json").is_file()
+        self._ft_cache = (now, available)
+        return available
+    
+    def _import_torch(self):
+        if self._torch is None:
+            import torch
+            self._torch = torch
+        return self._torch
+    
+    def _cpu_supports_bf16(self) -> bool:
+        torch = self._torch
+        for check in ("_is_avx512_bf16_supported", "_is_amx_tile_supported", "_is_arm_sve_bf16_supported"):
+            is_supported = getattr(torch.cpu, check, None)
+            if is_supported is not None and is_supported():
+                return True
+        return False
+    
+    async def generate_response(
+        self, 
+        prompt: str, 
+        max_length: int = 512,
+        temperature: float = 0.7,
+        do_sample: bool = True,
+        session_id: Optional[str] = None
+    ) -> str:
+        
+        if self.mock_mode:
+            return f"Mock response to: {prompt[:50]}... [Enable real model in /api/v1/training/model/load]"
+        
+        if self.model is None:
+            await self.load_model()
+        
+        if session_id and not self.model.config.is_encoder_decoder:
+            # A session's cache is taken out while its turn runs, so a concurrent request
+            # for the same session starts from a fresh prefill instead of sharing it
+            entry = self._take_session_cache(session_id)
+            loop = asyncio.get_running_loop()
+            try:
+                response, entry = await loop.run_in_executor(
+                    None, self._generate_session_turn, prompt, entry, temperature, do_sample
+                )
+            except Exception as e:
+                logger.error(f"Failed to generate response: {str(e)}")
+                return "I apologize, but I'm unable to generate a response at the moment."
+            self._store_session_cache(session_id, entry)
+            return response
+        
+        # Concurrent requests are collected by the batch worker and share one forward pass
+        if self._batch_queue is None:
+            self._batch_queue = asyncio.Queue()
+        if self._batch_worker is None or self._batch_worker.done():
+            self._batch_worker = asyncio.create_task(self._run_batch_worker())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._batch_queue.put((prompt, temperature, do_sample, future))
+        return await future
+    
+    async def generate_responses(
+        self,
+        prompts: List[str],
+        temperature: float = 0.7,
+        do_sample: bool = True
+    ) -> List[str]:
+        
+        if self.mock_mode:
+            return [f"Mock response to: {prompt[:50]}... [Enable real model in /api/v1/training/model/load]" for prompt in prompts]
+        
+        if self.model is None:
+            await self.load_model()
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._generate_batch, prompts, temperature, do_sample)
+    
+    async def stream_response(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        do_sample: bool = True
+    ) -> AsyncIterator[str]:
+        
+        if self.mock_mode:
+            yield f"Mock response to: {prompt[:50]}... [Enable real model in /api/v1/training/model/load]"
+            return
+        
+        if self.model is None:
+            await self.load_model()
+        
+        from transformers import TextIteratorStreamer
+        
+        torch = self._torch
+        input_ids = torch.tensor(self._prompt_ids([prompt]))
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        generation_kwargs = {
+            "input_ids": input_ids,
+            "attention_mask": torch.ones_like(input_ids),
+            "streamer": streamer,
+            **self._generation_kwargs(temperature, do_sample)
+        }
+        
+        errors: List[Exception] = []
+        
+        def generate():
+            try:
+                with torch.inference_mode():
+                    self.model.generate(**generation_kwargs)
+            except Exception as e:
+                # Without the end signal the consumer below would wait on the streamer forever
+                errors.append(e)
+                streamer.end()
+        
+        threading.Thread(target=generate, daemon=True).start()
+        
+        # The streamer's iterator blocks on a queue fed by the generate thread
+        while True:
+            text = await asyncio.to_thread(next, streamer, None)
+            if text is None:
+                break
+            if text:
+                yield text
+        
+        if errors:
+            raise errors[0]
     
-#     async def prepare_training_data(self, documents: List[Dict[str, Any]]) -> Dataset:
-#         training_texts = []
+    async def _run_batch_worker(self):
+        loop = asyncio.get_running_loop()
         
-#         for doc in documents:
-#             content = doc.get('content', '')
-#             title = doc.get('title', 'Documentation')
+        while True:
+            batch = [await self._batch_queue.get()]
+            deadline = loop.time() + BATCH_WINDOW_SECONDS
+            
+            while len(batch) < MAX_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._batch_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
             
-#             training_example = self._create_training_example(title, content)
-#             training_texts.append(training_example)
+            # Only requests with the same sampling settings can share a generate call
+            groups: Dict[tuple, list] = {}
+            for item in batch:
+                groups.setdefault((item[1], item[2]), []).append(item)
+            
+            for (temperature, do_sample), items in groups.items():
+                prompts = [item[0] for item in items]
+                try:
+                    responses = await loop.run_in_executor(None, self._generate_batch, prompts, temperature, do_sample)
+                except Exception as e:
+                    logger.error(f"Failed to generate response: {str(e)}")
+                    responses = ["I apologize, but I'm unable to generate a response at the moment."] * len(items)
+                
+                for item, response in zip(items, responses):
+                    if not item[3].done():
+                        item[3].set_result(response)
+    
+    def _generate_batch(self, prompts: List[str], temperature: float, do_sample: bool) -> List[str]:
+        torch = self._torch
+        generation_kwargs = self._generation_kwargs(temperature, do_sample)
+        input_ids = self._prompt_ids(prompts)
+        
+        # Entered here rather than by the caller: inference mode is thread-local and this
+        # runs in an executor thread
+        with torch.inference_mode():
+            if self._dtype == torch.bfloat16 and self._family == "t5":
+                # T5 overflows in pure BF16; autocast keeps the sensitive ops in FP32
+                with torch.autocast(device_type="cpu", dtype=torch.bfloat16):
+                    return self._generate_from_ids(input_ids, generation_kwargs)
+            return self._generate_from_ids(input_ids, generation_kwargs)
+    
+    def _generate_from_ids(self, input_ids: List[List[int]], generation_kwargs: Dict[str, Any]) -> List[str]:
+        batch = self.tokenizer.pad({"input_ids": input_ids}, return_tensors="pt")
+        output = self.model.generate(**batch, **generation_kwargs)
+        
+        # Decoder-only output repeats the left-padded prompt; decode only the continuation
+        if not self.model.config.is_encoder_decoder:
+            output = output[:, batch["input_ids"].shape[1]:]
+        
+        return [text.strip() for text in self.tokenizer.batch_decode(output, skip_special_tokens=True)]
+    
+    def _take_session_cache(self, session_id: str) -> Optional[tuple]:
+        now = time.monotonic()
+        while self._kv_cache:
+            _, _, last_used = next(iter(self._kv_cache.values()))
+            if now - last_used < SESSION_CACHE_TTL_SECONDS:
+                break
+            self._kv_cache.popitem(last=False)
+        
+        return self._kv_cache.pop(session_id, None)
+    
+    def _store_session_cache(self, session_id: str, entry: tuple):
+        self._kv_cache[session_id] = entry
+        self._kv_cache.move_to_end(session_id)
+        while len(self._kv_cache) > MAX_CACHED_SESSIONS:
+            self._kv_cache.popitem(last=False)
+    
+    def _generate_session_turn(
+        self,
+        prompt: str,
+        entry: Optional[tuple],
+        temperature: float,
+        do_sample: bool
+    ) -> tuple:
+        from transformers import DynamicCache
+        
+        torch = self._torch
+        turn_ids = self._prompt_ids([prompt], add_special_tokens=entry is None)[0]
+        
+        if entry is None:
+            history_ids, past_key_values = [], DynamicCache()
+        else:
+            history_ids, past_key_values, _ = entry
+        
+        # generate() skips the positions already held in past_key_values, so prefill
+        # only runs over the new turn
+        input_ids = torch.tensor([history_ids + turn_ids])
+        with torch.inference_mode():
+            output = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                past_key_values=past_key_values,
+                use_cache=True,
+                return_dict_in_generate=True,
+                **self._generation_kwargs(temperature, do_sample)
+            )
+        
+        sequence = output.sequences[0]
+        response = self.tokenizer.decode(sequence[input_ids.shape[1]:], skip_special_tokens=True).strip()
+        return response, (sequence.tolist(), output.past_key_values, time.monotonic())
+    
+    def _cache_prompt_template(self):
+        template = "<|user|>\n\x00<|end|>\n<|assistant|>\n"
+        if hasattr(self.tokenizer, 'apply_chat_template'):
+            template = self.tokenizer.apply_chat_template(
+                [{"role": "user", "content": "\x00"}],
+                tokenize=False,
+                add_generation_prompt=True
+            )
+        
+        prefix, suffix = template.split("\x00", 1)
+        self._phi_prefix_ids = self.tokenizer.encode(prefix, add_special_tokens=False)
+        self._phi_suffix_ids = self.tokenizer.encode(suffix, add_special_tokens=False)
+    
+    def _phi_prompt_ids(self, prompts: List[str], add_special_tokens: bool = True) -> List[List[int]]:
+        # Chat-template prefix/suffix ids are cached at load, so only the user text is tokenized
+        return [
+            self._phi_prefix_ids + self.tokenizer.encode(prompt, add_special_tokens=False) + self._phi_suffix_ids
+            for prompt in prompts
+        ]
+    
+    def _dialo_prompt_ids(self, prompts: List[str], add_special_tokens: bool = True) -> List[List[int]]:
+        return self._plain_prompt_ids([f"Human: {prompt}\nBot:" for prompt in prompts], add_special_tokens)
+    
+    def _plain_prompt_ids(self, prompts: List[str], add_special_tokens: bool = True) -> List[List[int]]:
+        return self.tokenizer(prompts, truncation=True, add_special_tokens=add_special_tokens)["input_ids"]
+    
+    def _generation_kwargs(self, temperature: float, do_sample: bool) -> Dict[str, Any]:
+        return {**self._generation_defaults, "temperature": temperature, "do_sample": do_sample}
+    
+    async def prepare_training_data(self, documents: List[Dict[str, Any]]) -> "Dataset":
+        from datasets import Dataset
+        
+        training_texts = [
+            self._create_training_example(doc.get('title', 'Documentation'), doc.get('content', ''))
+            for doc in documents
+        ]
+        
+        if self.tokenizer is None:
+            await self.load_model(use_fine_tuned=False, for_training=True)
         
-#         dataset = Dataset.from_dict({"text": training_texts})
-#         return dataset
+        # One call over the whole corpus lets the fast (Rust) tokenizer batch internally;
+        # padding is left to the data collator so each batch only pads to its own longest example
+        encodings = self.tokenizer(training_texts, truncation=True, max_length=512)
+        
+        dataset = Dataset.from_dict({**encodings, "text": training_texts})
+        return dataset
     
-#     def _create_training_example(self, title: str, content: str) -> str:
-#         return f"""<|system|>You are a helpful AI assistant that answers questions about {title} documentation. Provide accurate and helpful responses based on the documentation.<|endoftext|>
-# <|user|>What is this documentation about?<|endoftext|>
-# <|assistant|>{content[:500]}...<|endoftext|>"""
+    def _create_training_example(self, title: str, content: str) -> str:
+        snippet = content if len(content) <= TRAINING_SNIPPET_LENGTH else content[:TRAINING_SNIPPET_LENGTH]
+        return "".join((
+            TRAINING_SYSTEM_PREFIX, title, TRAINING_SYSTEM_SUFFIX,
+            TRAINING_USER_TURN,
+            "<|assistant|>", snippet, "...<|endoftext|>"
+        ))
     
-#     async def fine_tune_model(
-#         self, 
-#         training_dataset: Dataset,
-#         learning_rate: float = 5e-4,
-#         num_epochs: int = 3,
-#         batch_size: int = 4
-#     ):
-#         logger.info("Starting model fine-tuning...")
-        
-#         if self.model is None:
-#             await self.load_model(use_fine_tuned=False)
-        
-#         lora_config = LoraConfig(
-#             task_type=TaskType.CAUSAL_LM,
-#             inference_mode=False,
-#             r=16,
-#             lora_alpha=32,
-#             lora_dropout=0.1,
-#             target_modules=["q_proj", "v_proj"]  # Target attention layers
-#         )
-        
-#         model = get_peft_model(self.model, lora_config)
-        
-#         def tokenize_function(examples):
-#             return self.tokenizer(
-#                 examples["text"], 
-#                 truncation=True, 
-#                 padding=True, 
-#                 max_length=512
-#             )
-        
-#         tokenized_dataset = training_dataset.map(tokenize_function, batched=True)
-        
-#         training_args = TrainingArguments(
-#             output_dir=self.model_path,
-#             overwrite_output_dir=True,
-#             num_train_epochs=num_epochs,
-#             per_device_train_batch_size=batch_size,
-#             gradient_accumulation_steps=4,
-#             warmup_steps=100,
-#             learning_rate=learning_rate,
-#             fp16=False,
-#             logging_steps=50,
-#             save_steps=500,
-#             evaluation_strategy="no",
-#             save_strategy="epoch",
-#             load_best_model_at_end=False,
-#             report_to=None,
-#         )
-        
-#         data_collator = DataCollatorForLanguageModeling(
-#             tokenizer=self.tokenizer,
-#             mlm=False
-#         )
-        
-#         trainer = Trainer(
-#             model=model,
-#             args=training_args,
-#             train_dataset=tokenized_dataset,
-#             data_collator=data_collator,
-#         )
-        
-#         trainer.train()
-        
-#         trainer.save_model(self.model_path)
-#         self.tokenizer.save_pretrained(self.model_path)
-        
-#         logger.info(f"Model fine-tuned and saved to: {self.model_path}")
+    async def fine_tune_model(
+        self, 
+        training_dataset: "Dataset",
+        learning_rate: float = 5e-4,
+        num_epochs: int = 3,
+        batch_size: int = 8
+    ):
+        from transformers import TrainingArguments, Trainer, DataCollatorForLanguageModeling
+        from peft import LoraConfig, get_peft_model, TaskType
+        
+        logger.info("Starting model fine-tuning...")
+        os.makedirs(self.model_path, exist_ok=True)
+        
+        # LoRA needs plain trainable nn.Linear layers, so reload without quantization or compilation
+        if self.model is None or self._inference_optimized:
+            await self.load_model(use_fine_tuned=False, for_training=True)
+        
+        lora_config = LoraConfig(
+            task_type=TaskType.CAUSAL_LM,
+            inference_mode=False,
+            r=16,
+            lora_alpha=32,
+            lora_dropout=0.1,
+            target_modules=["q_proj", "v_proj"]  # Target attention layers
+        )
+        
+        # Recompute activations in the backward pass instead of keeping them for all 512 positions
+        self.model.gradient_checkpointing_enable(gradient_checkpointing_kwargs={"use_reentrant": False})
+        
+        model = get_peft_model(self.model, lora_config)
+        
+        # Mixed-precision autocast over the FP32 master weights where the hardware has BF16
+        torch = self._torch
+        use_bf16 = self._cpu_supports_bf16() or (torch.cuda.is_available() and torch.cuda.is_bf16_supported())
+        
+        training_args = TrainingArguments(
+            output_dir=self.model_path,
+            overwrite_output_dir=True,
+            num_train_epochs=num_epochs,
+            per_device_train_batch_size=batch_size,
+            gradient_accumulation_steps=2,
+            warmup_steps=100,
+            learning_rate=learning_rate,
+            bf16=use_bf16,
+            logging_steps=50,
+            save_steps=500,
+            save_safetensors=True,
+            evaluation_strategy="no",
+            save_strategy="epoch",
+            load_best_model_at_end=False,
+            report_to=None,
+        )
+        
+        data_collator = DataCollatorForLanguageModeling(
+            tokenizer=self.tokenizer,
+            mlm=False
+        )
+        
+        trainer = Trainer(
+            model=model,
+            args=training_args,
+            train_dataset=training_dataset,
+            data_collator=data_collator,
+        )
+        
+        trainer.train()
+        
+        trainer.save_model(self.model_path)
+        self.tokenizer.save_pretrained(self.model_path)
+        self._ft_cache = (float("-inf"), False)
+        
+        logger.info(f"Model fine-tuned and saved to: {self.model_path}")
     
-#     async def get_model_info(self) -> Dict[str, Any]:
-#         info = {
-#             "base_model": self.model_name,
-#             "model_path": self.model_path,
-#             "fine_tuned_available": os.path.exists(os.path.join(self.model_path, "config.json")),
-#             "model_loaded": self.model is not None
-#         }
-        
-#         if self.model is not None:
-#             info["model_parameters"] = sum(p.numel() for p in self.model.parameters())
-#             info["trainable_parameters"] = sum(p.numel() for p in self.model.parameters() if p.requires_grad)
-        
-#         return info
+    async def get_model_info(self) -> Dict[str, Any]:
+        info = {
+            "base_model": self.model_name,
+            "model_path": self.model_path,
+            "fine_tuned_available": self._has_finetuned(),
+            "model_loaded": self.model is not None
+        }
+        
+        if self.model is not None:
+            info["model_parameters"] = sum(p.numel() for p in self.model.parameters())
+            info["trainable_parameters"] = sum(p.numel() for p in self.model.parameters() if p.requires_grad)
+        
+        return info
 
 
-# local_llm_service = LocalLLMService()
+local_llm_service = LocalLLMService()
 
-# def get_local_llm_service() -> LocalLLMService:
-#     return local_llm_service
\ No newline at end of file
+def get_local_llm_service() -> LocalLLMService:
+    return local_llm_service
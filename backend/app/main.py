@@ -13,11 +13,24 @@ load_dotenv()
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+import orjson
 import uvicorn
 from contextlib import asynccontextmanager
 
 from app.config import settings
 from app.api import router as api_router
+from app.rag import get_rag_service
+
+
+class AppJSONResponse(ORJSONResponse):
+    """ORJSON response that also serializes numpy arrays and naive datetimes as UTC."""
+    
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+        )
 
 
 @asynccontextmanager
@@ -26,6 +39,12 @@ async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Starting Docet backend...")
     
+    if settings.WARM_UP_ON_STARTUP:
+        try:
+            await get_rag_service().warm_up()
+        except Exception as e:
+            print(f"⚠️ RAG warm-up failed: {e}")
+    
     yield
     
     # Shutdown
@@ -39,7 +58,8 @@ def create_app() -> FastAPI:
         title="Docet API",
         description="Smart, self-updating API support assistant",
         version="0.1.0",
-        lifespan=lifespan
+        lifespan=lifespan,
+        default_response_class=AppJSONResponse
     )
     
     # CORS middleware
@@ -72,11 +92,34 @@ def create_app() -> FastAPI:
 app = create_app()
 
 
+def _event_loop() -> str:
+    try:
+        import uvloop  # noqa: F401
+        return "uvloop"
+    except ImportError:
+        return "asyncio"
+
+
+def _http_protocol() -> str:
+    try:
+        import httptools  # noqa: F401
+        return "httptools"
+    except ImportError:
+        return "h11"
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=settings.DEBUG,
+        # The reloader watches files in a supervisor process; only for local development
+        reload=settings.DEBUG and settings.ENV == "dev",
+        loop=_event_loop(),
+        http=_http_protocol(),
+        # One worker: chat history, session locks, collection versions and the query, semantic,
+        # version-info and embedding caches are all per-process, so other workers would keep
+        # serving stale results after an ingest until that state is shared
+        workers=1,
         log_level="info" if not settings.DEBUG else "debug"
     )
\ No newline at end of file
@@ -1,18 +1,45 @@
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, ConfigDict, BeforeValidator, field_validator
 from typing import Optional, Dict, Any, List
+from typing_extensions import Annotated
 from datetime import datetime
 from enum import Enum
+import base64
+import numpy as np
 
 
 class DocumentType(str, Enum):
     OPENAPI_INFO = "openapi_info"
     OPENAPI_ENDPOINT = "openapi_endpoint"
+    OPENAPI_SERVERS = "openapi_servers"
+    OPENAPI_SECURITY = "openapi_security"
+    OPENAPI_SCHEMA = "openapi_schema"
     SWAGGER_HTML = "swagger_html"
     MARKDOWN = "markdown"
     HTML = "html"
     PDF = "pdf"
     DOCX = "docx"
+    
+    @classmethod
+    def from_str(cls, value: str) -> "DocumentType":
+        return _DT_CACHE.get(value, cls.MARKDOWN)
+
+
+# Value -> member lookup, avoiding Enum.__call__ on every Document
+_DT_CACHE: Dict[str, DocumentType] = {member.value: member for member in DocumentType}
+
+
+def _to_float32_bytes(value: Any) -> Any:
+    if isinstance(value, str):
+        # JSON input carries the vector base64-encoded, matching ser_json_bytes
+        return base64.b64decode(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value)
+    return np.asarray(value, dtype="<f4").tobytes()
+
+
+# Vectors are held as contiguous little-endian float32 instead of a list of Python floats
+EmbeddingF32 = Annotated[bytes, BeforeValidator(_to_float32_bytes)]
 
 
 class Document(BaseModel):
@@ -27,12 +54,16 @@ class Document(BaseModel):
     updated_at: Optional[datetime] = Field(None, description="Last update timestamp")
     version: Optional[str] = Field(None, description="Document version")
     
-    class Config:
-        use_enum_values = True
+    @field_validator("doc_type", mode="before")
+    @classmethod
+    def _resolve_doc_type(cls, value: Any) -> Any:
+        return DocumentType.from_str(value) if isinstance(value, str) else value
 
 
 class DocumentChunk(BaseModel):
     
+    model_config = ConfigDict(ser_json_bytes="base64")
+    
     id: str = Field(..., description="Unique chunk identifier")
     document_id: str = Field(..., description="Parent document ID")
     content: str = Field(..., description="Chunk content")
@@ -40,14 +71,28 @@ class DocumentChunk(BaseModel):
     start_char: int = Field(..., description="Start character position in original document")
     end_char: int = Field(..., description="End character position in original document")
     metadata: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Chunk metadata")
-    embedding: Optional[List[float]] = Field(None, description="Vector embedding")
+    embedding: Optional[EmbeddingF32] = Field(None, description="Vector embedding (float32 little-endian bytes)")
+    
+    # Parent document shared by every chunk, so document-level fields are stored once
+    _document: Optional[Document] = PrivateAttr(default=None)
     
     @property
     def chunk_id(self) -> str:
         return self.id
     
-    class Config:
-        use_enum_values = True
+    @property
+    def document(self) -> Optional[Document]:
+        return self._document
+    
+    @property
+    def chunk_size(self) -> int:
+        return len(self.content)
+    
+    @property
+    def embedding_array(self) -> Optional[np.ndarray]:
+        if self.embedding is None:
+            return None
+        return np.frombuffer(self.embedding, dtype="<f4")
 
 
 class ChatMessage(BaseModel):
@@ -87,6 +132,8 @@ class IngestionJob(BaseModel):
 
 class SearchResult(BaseModel):
     
+    model_config = ConfigDict(validate_assignment=False, extra="ignore")
+    
     chunk_id: str = Field(..., description="Chunk identifier")
     document_id: str = Field(..., description="Parent document identifier")
     content: str = Field(..., description="Chunk content")
@@ -102,6 +149,8 @@ class EmbeddingRequest(BaseModel):
 
 class EmbeddingResponse(BaseModel):
     
-    embedding: List[float] = Field(..., description="Vector embedding")
+    model_config = ConfigDict(validate_assignment=False, extra="ignore", ser_json_bytes="base64")
+    
+    embedding: EmbeddingF32 = Field(..., description="Vector embedding (float32 little-endian bytes)")
     model: str = Field(..., description="Model used for embedding")
     dimensions: int = Field(..., description="Embedding dimensions")
\ No newline at end of file
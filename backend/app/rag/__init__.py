@@ -1,4 +1,5 @@
 
 from .service import RAGService, get_rag_service
+from .query_cache import QueryCache, SemanticCache, get_query_cache, get_semantic_cache, invalidate_chatbot_caches
 
-__all__ = ["RAGService", "get_rag_service"]
\ No newline at end of file
+__all__ = ["RAGService", "get_rag_service", "QueryCache", "SemanticCache", "get_query_cache", "get_semantic_cache", "invalidate_chatbot_caches"]
\ No newline at end of file
@@ -0,0 +1,179 @@
+"""
+Query caches for RAG
+Keeps recent (chatbot, query, limit) search results so repeated questions skip the vector DB,
+and recent answers keyed by query embedding so paraphrased questions in the same conversation
+skip the whole pipeline
+"""
+
+import time
+import itertools
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_TTL_SECONDS = 300.0
+
+DEFAULT_SEMANTIC_MAX_SIZE = 512
+DEFAULT_SEMANTIC_THRESHOLD = 0.95
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache with per-entry expiry, keyed by (chatbot_id, query, limit)
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, ttl: float = DEFAULT_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str, int], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, chatbot_id: str, query: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Return cached results, or None on a miss or expired entry"""
+
+        key = (chatbot_id, query, limit)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            stored_at, results = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return results
+
+    def put(self, chatbot_id: str, query: str, limit: int, results: List[Dict[str, Any]]):
+        """Store results, evicting the least recently used entries beyond max_size"""
+
+        key = (chatbot_id, query, limit)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, chatbot_id: str):
+        """Drop every cached result for a chatbot, e.g. after its documents change"""
+
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == chatbot_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SemanticCache:
+    """
+    Thread-safe LRU of RAG responses keyed by normalized query embedding.
+    A lookup matches the most similar cached query of the same chatbot and session
+    when its cosine similarity reaches the threshold. Answers are generated with the
+    session's conversation history, so they are never served to another session.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_SEMANTIC_MAX_SIZE,
+        threshold: float = DEFAULT_SEMANTIC_THRESHOLD,
+        ttl: float = DEFAULT_TTL_SECONDS
+    ):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.ttl = ttl
+        # entry id -> ((chatbot_id, session_id), embedding, stored_at, response)
+        self._entries: "OrderedDict[int, Tuple[Tuple[str, str], np.ndarray, float, Dict[str, Any]]]" = OrderedDict()
+        # (chatbot_id, session_id) -> (entry ids, stacked embeddings), rebuilt lazily after changes
+        self._matrices: Dict[Tuple[str, str], Tuple[List[int], np.ndarray]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.RLock()
+
+    def get(self, chatbot_id: str, session_id: str, embedding: np.ndarray) -> Optional[Dict[str, Any]]:
+        """Return the session's cached response for the closest matching query, if close enough"""
+
+        scope = (chatbot_id, session_id)
+        with self._lock:
+            matrix_entry = self._matrix_for(scope)
+            if matrix_entry is None:
+                return None
+
+            entry_ids, matrix = matrix_entry
+            similarities = matrix @ embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+
+            entry_id = entry_ids[best]
+            _, _, stored_at, response = self._entries[entry_id]
+            if time.monotonic() - stored_at > self.ttl:
+                self._remove(entry_id, scope)
+                return None
+
+            self._entries.move_to_end(entry_id)
+            return response
+
+    def put(self, chatbot_id: str, session_id: str, embedding: np.ndarray, response: Dict[str, Any]):
+        """Store a response, evicting the least recently used entries beyond max_size"""
+
+        scope = (chatbot_id, session_id)
+        with self._lock:
+            self._entries[next(self._ids)] = (scope, embedding, time.monotonic(), response)
+            self._matrices.pop(scope, None)
+            while len(self._entries) > self.max_size:
+                _, (evicted_scope, _, _, _) = self._entries.popitem(last=False)
+                self._matrices.pop(evicted_scope, None)
+
+    def invalidate(self, chatbot_id: str):
+        """Drop every cached response for a chatbot, in all sessions"""
+
+        with self._lock:
+            for entry_id in [entry_id for entry_id, entry in self._entries.items() if entry[0][0] == chatbot_id]:
+                del self._entries[entry_id]
+            for scope in [scope for scope in self._matrices if scope[0] == chatbot_id]:
+                del self._matrices[scope]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrices.clear()
+
+    def _matrix_for(self, scope: Tuple[str, str]) -> Optional[Tuple[List[int], np.ndarray]]:
+        if scope not in self._matrices:
+            entries = [(entry_id, entry[1]) for entry_id, entry in self._entries.items() if entry[0] == scope]
+            if not entries:
+                return None
+            self._matrices[scope] = ([entry_id for entry_id, _ in entries], np.stack([vector for _, vector in entries]))
+        return self._matrices[scope]
+
+    def _remove(self, entry_id: int, scope: Tuple[str, str]):
+        del self._entries[entry_id]
+        self._matrices.pop(scope, None)
+
+
+# Global caches shared by the RAG service and ingestion invalidation
+_query_cache = None
+_semantic_cache = None
+
+def get_query_cache() -> QueryCache:
+    """Get global query cache instance"""
+    global _query_cache
+    if _query_cache is None:
+        _query_cache = QueryCache()
+    return _query_cache
+
+def get_semantic_cache() -> SemanticCache:
+    """Get global semantic cache instance"""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache()
+    return _semantic_cache
+
+def invalidate_chatbot_caches(chatbot_id: str):
+    """Drop cached results and responses for a chatbot whose documents changed"""
+    get_query_cache().invalidate(chatbot_id)
+    get_semantic_cache().invalidate(chatbot_id)
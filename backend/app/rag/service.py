@@ -3,15 +3,62 @@ RAG (Retrieval-Augmented Generation) Service
 Combines vector search with language model generation for intelligent responses
 """
 
+import re
 import json
+import time
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional, Union
-from ..vector.chroma_service import get_chroma_service
+import functools
+import numpy as np
+from typing import List, Dict, Any, Optional, Union, Tuple, AsyncIterator
+from ..config import settings
+from ..vector.chroma_service import get_chroma_service, warm_up_embedding_model
 from ..llm.gemini_service import get_gemini_llm_service
-from ..tools import get_tool_function, is_tool_allowed_for_chatbot
+from ..tools import get_tool_function, tool_accepts_chatbot_id, is_async_tool, is_tool_allowed_for_chatbot
+from .query_cache import get_query_cache, get_semantic_cache
 
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=1)
+def _token_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable, estimating context tokens from length: {e}")
+        return None
+
+# Queries shorter than this, or leaning on earlier turns, are rewritten by the LLM before retrieval
+MIN_DIRECT_QUERY_TOKENS = 4
+_DEICTIC_WORDS = frozenset({
+    "it", "its", "this", "these", "those", "they", "them", "their",
+    "above", "previous", "former", "latter"
+})
+_WORD = re.compile(r"\w+")
+
+# A planned query at least this similar (word Jaccard) to the user's reuses the speculative search
+PLANNED_QUERY_REUSE_SIMILARITY = 0.5
+
+# Results at or below this cosine similarity are not used as context
+# (0.1 on the old 1 - squared-L2 scale, which was 2 * cosine - 1)
+MIN_CONTEXT_SIMILARITY = 0.55
+
+# Extra retrieve-and-generate rounds allowed when Gemini asks for more context
+MAX_REFINEMENTS = 2
+REFINED_SEARCH_LIMIT = 10
+
+# Prompt budget for retrieved context. Gemini's tokenizer only runs server-side, so chunks are
+# measured with tiktoken's cl100k_base, or ~4 characters per token if that cannot be loaded
+TARGET_CONTEXT_TOKENS = 6000
+CHARS_PER_TOKEN = 4
+
+# How long knowledge-stats lookups are reused
+COLLECTION_STATS_TTL_SECONDS = 30
+LLM_INFO_TTL_SECONDS = 600
+
+NO_DOCUMENTS_RESPONSE = "I don't have any relevant information to answer your question. Please make sure the API documentation has been ingested for this chatbot."
+NO_CONTEXT_SUGGESTION = "Try being more specific or use different keywords related to the API."
+
 class RAGService:
     """
     RAG service that retrieves relevant documents and generates responses
@@ -21,6 +68,12 @@ class RAGService:
     def __init__(self):
         self.vector_service = get_chroma_service()
         self.llm_service = get_gemini_llm_service()
+        self._result_cache = get_query_cache()
+        self._semantic_cache = get_semantic_cache()
+        # Backpressure on Gemini: bounds in-flight LLM calls across all requests on this instance
+        self._llm_sem = asyncio.Semaphore(settings.MAX_CONCURRENT_LLM)
+        self._stats_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._llm_info_cache: Optional[Tuple[float, Dict[str, Any]]] = None
         
     async def generate_response(
         self, 
@@ -34,145 +87,358 @@ class RAGService:
         1. Retrieve relevant documents from vector DB
         2. Create context from retrieved documents  
         3. Generate response using LLM with context
+        Self-contained queries first try the semantic cache, so paraphrases of a recent
+        question in the same conversation skip the pipeline entirely
         """
         
-        # Step 1: Ask Gemini to produce a retrieval query by invoking the search tool
-        logger.info(f"Requesting Gemini to generate a retrieval query for chatbot {chatbot_id} (user query preview: {query[:100]})")
-
-        # Prompt Gemini to generate a concise retrieval query and call the tool
-        retrieval_prompt = f"""
-You are a search planner for an API documentation assistant.
-User asked: "{query}"
-
-Produce a concise search query that will return relevant documentation sections (endpoints, operations, descriptions) which can be used to answer the user's question. Call the tool `search_documentation` with the generated query.
-
-Only call the tool with a short, focused query string.
-"""
-
-        # Request function call metadata instead of executing it directly
-        llm_action = await self.llm_service.generate_response(
-            prompt=retrieval_prompt,
-            chatbot_id=chatbot_id,
-            session_id=session_id or f"{chatbot_id}:retrieval",
-            return_function_call=True
-        )
-
-        search_results = None
-
-        # If LLM returned a function call action, execute the corresponding tool
-        if isinstance(llm_action, dict) and llm_action.get("action") == "function_call":
-            func_name = llm_action.get("function_name")
-            func_args = llm_action.get("function_args", {})
-            logger.info(f"LLM requested tool '{func_name}' with args: {func_args}")
-
-            # Only allow approved tools
-            if not is_tool_allowed_for_chatbot(func_name, chatbot_id):
-                logger.warning(f"Tool {func_name} not allowed for chatbot {chatbot_id}")
-            else:
-                tool_fn = get_tool_function(func_name)
-                if tool_fn:
-                    # Inject chatbot_id if needed
-                    if 'chatbot_id' in tool_fn.__code__.co_varnames:
-                        func_args['chatbot_id'] = chatbot_id
-
-                    try:
-                        tool_result = tool_fn(**func_args)
-                        # Expect structured result {results: [...]}
-                        if isinstance(tool_result, dict) and 'results' in tool_result:
-                            search_results = tool_result['results']
-                        else:
-                            # Fall back to vector search if tool returns text or unexpected format
-                            logger.info("Tool returned non-structured results, falling back to vector search")
-                            search_results = self.vector_service.search_similar(chatbot_id=chatbot_id, query=query, limit=max_context_chunks)
-                    except Exception as e:
-                        logger.error(f"Error executing tool {func_name}: {e}")
-                        search_results = self.vector_service.search_similar(chatbot_id=chatbot_id, query=query, limit=max_context_chunks)
-
-        else:
-            # Fallback: direct vector search using original user query
-            logger.info("LLM did not return a function action; using direct vector search")
-            search_results = self.vector_service.search_similar(chatbot_id=chatbot_id, query=query, limit=max_context_chunks)
+        # Answers depend on the Gemini conversation history, so the cache is scoped to it
+        cache_session_id = session_id or f"{chatbot_id}:default"
+        query_embedding = None
+        if not self._needs_query_rewrite(query):
+            # One embedding serves both the cache lookup and, on a miss, the vector search
+            query_embedding = (await asyncio.to_thread(self.vector_service.encode_cached, [query]))[0]
+            cached_response = self._semantic_cache.get(chatbot_id, cache_session_id, query_embedding)
+            if cached_response is not None:
+                logger.info(f"Semantic cache hit for chatbot {chatbot_id}")
+                return {**cached_response, "session_id": session_id}
+        
+        response = await self._generate_uncached(chatbot_id, query, session_id, max_context_chunks, query_embedding)
+        
+        # Only grounded answers are worth reusing
+        if query_embedding is not None and response.get("context_used"):
+            self._semantic_cache.put(chatbot_id, cache_session_id, query_embedding, response)
+        
+        return response
+    
+    async def _generate_uncached(
+        self,
+        chatbot_id: str,
+        query: str,
+        session_id: Optional[str],
+        max_context_chunks: int,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Dict[str, Any]:
+        """Run the full retrieve / build context / generate pipeline"""
+        
+        # Step 1: Retrieve relevant documents
+        search_results = await self._retrieve(chatbot_id, query, session_id, max_context_chunks, query_embedding)
+        await self._load_token_encoding()
 
         if not search_results:
             logger.warning(f"No relevant documents found for chatbot {chatbot_id}")
             return {
-                "response": "I don't have any relevant information to answer your question. Please make sure the API documentation has been ingested for this chatbot.",
+                "response": NO_DOCUMENTS_RESPONSE,
                 "sources": [],
                 "context_used": False,
                 "session_id": session_id
             }
         
-        # Step 2: Build context from retrieved documents
-        context_chunks = []
-        sources = []
-        
-        for result in search_results:
-            # Only use relevant results (similarity > 0.1)
-            if result.get("similarity_score", 0) > 0.1:
-                context_chunks.append(result["content"])
-                
-                # Track sources for transparency
-                metadata = result.get("metadata", {})
-                source_info = {
-                    "title": metadata.get("title", "Unknown"),
-                    "url": metadata.get("source_url", ""),
-                    "similarity": round(result.get("similarity_score", 0), 3)
-                }
-                sources.append(source_info)
-        
-        # Step 3: Create prompt with context
-        if context_chunks:
-            context_text = "\n\n".join(context_chunks[:max_context_chunks])
+        # Steps 2-3 repeat when Gemini asks for more context; refinements only redo the
+        # search with its query, never the retrieval planning
+        for refinement in range(MAX_REFINEMENTS + 1):
+            # Step 2: Build context from retrieved documents
+            context_chunks, sources = self._build_context(search_results)
             
-            # Create enhanced RAG prompt 
-            rag_prompt = self._create_enhanced_rag_prompt(query, context_text)
+            # Step 3: Create prompt with context
+            if context_chunks:
+                context_text = "\n\n".join(context_chunks)
+                
+                # Create enhanced RAG prompt 
+                prompt = self._create_enhanced_rag_prompt(query, context_text)
+                
+                logger.info(f"Using {len(context_chunks)} context chunks for response generation")
+            else:
+                # No relevant context found - suggest more specific query
+                logger.info("No sufficiently relevant context found, suggesting query refinement")
+                
+                prompt = self._create_no_context_prompt(query)
             
-            logger.info(f"Using {len(context_chunks)} context chunks for response generation")
+            async with self._llm_sem:
+                llm_response = await self.llm_service.generate_response(
+                    prompt=prompt,
+                    chatbot_id=chatbot_id,
+                    session_id=session_id or f"{chatbot_id}:default"
+                )
             
-            # Generate response with context
-            llm_response = await self.llm_service.generate_response(
-                prompt=rag_prompt,
-                chatbot_id=chatbot_id,
-                session_id=session_id or f"{chatbot_id}:default"
-            )
-            
-            # Handle different response types
-            if isinstance(llm_response, dict):
-                # Handle action requests (more context, tool usage)
-                return await self._handle_action_request(llm_response, chatbot_id, query, session_id)
-            else:
+            if not isinstance(llm_response, dict):
                 # Regular text response
-                return {
+                response = {
                     "response": llm_response,
                     "sources": sources,
-                    "context_used": True,
-                    "context_chunks_count": len(context_chunks),
+                    "context_used": bool(context_chunks),
                     "session_id": session_id
                 }
+                if context_chunks:
+                    response["context_chunks_count"] = len(context_chunks)
+                else:
+                    response["suggestion"] = NO_CONTEXT_SUGGESTION
+                return response
+            
+            if llm_response.get("action") != "request_more_context" or refinement == MAX_REFINEMENTS:
+                return self._handle_action_request(llm_response, query, session_id)
+            
+            # Search again with the refined query, with more results than the first pass
+            refined_query = llm_response.get("query", query)
+            logger.info(f"Gemini requested more context with query: {refined_query}")
+            
+            search_results = await asyncio.to_thread(self._search, chatbot_id, refined_query, REFINED_SEARCH_LIMIT)
+            if not search_results:
+                return self._no_refined_context_response(query, refined_query, session_id)
+    
+    async def generate_response_stream(
+        self,
+        chatbot_id: str,
+        query: str,
+        session_id: Optional[str] = None,
+        max_context_chunks: int = 8
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of generate_response:
+        yields {"type": "delta", "text": ...} events, then one {"type": "done", ...} event
+        """
+        
+        search_results = await self._retrieve(chatbot_id, query, session_id, max_context_chunks)
+        
+        if not search_results:
+            logger.warning(f"No relevant documents found for chatbot {chatbot_id}")
+            yield {"type": "delta", "text": NO_DOCUMENTS_RESPONSE}
+            yield {"type": "done", "sources": [], "context_used": False, "session_id": session_id}
+            return
         
+        await self._load_token_encoding()
+        context_chunks, sources = self._build_context(search_results)
+        
+        if context_chunks:
+            context_text = "\n\n".join(context_chunks)
+            prompt = self._create_enhanced_rag_prompt(query, context_text)
+            logger.info(f"Streaming with {len(context_chunks)} context chunks")
         else:
-            # No relevant context found - suggest more specific query
             logger.info("No sufficiently relevant context found, suggesting query refinement")
-            
-            general_prompt = self._create_no_context_prompt(query)
-            
-            general_response = await self.llm_service.generate_response(
-                prompt=general_prompt,
+            prompt = self._create_no_context_prompt(query)
+        
+        async with self._llm_sem:
+            async for text in self.llm_service.stream_response(
+                prompt=prompt,
                 chatbot_id=chatbot_id,
                 session_id=session_id or f"{chatbot_id}:default"
+            ):
+                yield {"type": "delta", "text": text}
+        
+        done_event = {
+            "type": "done",
+            "sources": sources,
+            "context_used": bool(context_chunks),
+            "context_chunks_count": len(context_chunks),
+            "session_id": session_id
+        }
+        if not context_chunks:
+            done_event["suggestion"] = NO_CONTEXT_SUGGESTION
+        yield done_event
+    
+    async def _retrieve(
+        self,
+        chatbot_id: str,
+        query: str,
+        session_id: Optional[str],
+        max_context_chunks: int,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve search results, planning the query with Gemini only when needed.
+        query_embedding, when the caller already has it, is used for the direct search
+        """
+        
+        search_results = None
+        
+        # Self-contained queries are searched as-is; only vague ones get a Gemini-planned query
+        if self._needs_query_rewrite(query):
+            # Search with the raw query while Gemini plans, so a close plan costs no extra search
+            llm_action, speculative_results = await asyncio.gather(
+                self._request_retrieval_plan(chatbot_id, query, session_id),
+                asyncio.to_thread(self._search, chatbot_id, query, max_context_chunks),
+                return_exceptions=True
             )
+            if isinstance(llm_action, Exception):
+                logger.error(f"Error requesting retrieval plan: {llm_action}")
+                llm_action = None
+            if isinstance(speculative_results, Exception):
+                logger.error(f"Error in speculative vector search: {speculative_results}")
+                speculative_results = None
             
-            # Handle action requests even without context
-            if isinstance(general_response, dict):
-                return await self._handle_action_request(general_response, chatbot_id, query, session_id)
-            
-            return {
-                "response": general_response,
-                "sources": [],
-                "context_used": False,
-                "session_id": session_id,
-                "suggestion": "Try being more specific or use different keywords related to the API."
-            }
+            search_results = await self._run_retrieval_plan(llm_action, chatbot_id, query, speculative_results)
+            if search_results is None:
+                search_results = speculative_results
+        
+        if search_results is None:
+            # Direct vector search using original user query
+            search_results = await asyncio.to_thread(self._search, chatbot_id, query, max_context_chunks, query_embedding)
+        
+        return search_results
+    
+    def _build_context(self, search_results: List[Dict[str, Any]]) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Collect relevant chunk texts within the context token budget, with their source info"""
+        
+        # Only use relevant results, selected with one vectorized threshold over all scores
+        scores = np.fromiter(
+            (result.get("similarity_score", 0) for result in search_results),
+            dtype=np.float64,
+            count=len(search_results)
+        )
+        relevant = np.flatnonzero(scores > MIN_CONTEXT_SIMILARITY)
+        
+        # Overlapping documents yield identical chunks; keep only the first (best ranked) copy
+        seen = set()
+        unique = []
+        for i in relevant:
+            content_key = hash(" ".join(search_results[i]["content"].split()))
+            if content_key not in seen:
+                seen.add(content_key)
+                unique.append(i)
+        
+        # Pack the most similar chunks first until the token budget is spent; a chunk that
+        # does not fit is skipped so smaller, lower-ranked ones can still use the space
+        unique.sort(key=lambda i: scores[i], reverse=True)
+        packed = []
+        budget = TARGET_CONTEXT_TOKENS
+        for i in unique:
+            tokens = self._estimate_tokens(search_results[i]["content"])
+            if tokens <= budget or not packed:
+                packed.append(i)
+                budget -= tokens
+        
+        context_chunks = [search_results[i]["content"] for i in packed]
+        
+        # Track sources for transparency
+        sources = []
+        for i in packed:
+            metadata = search_results[i].get("metadata", {})
+            sources.append({
+                "title": metadata.get("title", "Unknown"),
+                "url": metadata.get("source_url", ""),
+                "similarity": round(float(scores[i]), 3)
+            })
+        
+        return context_chunks, sources
+    
+    async def _load_token_encoding(self):
+        """First tiktoken load can download the BPE file, so it runs off the event loop"""
+        if _token_encoding.cache_info().currsize == 0:
+            await asyncio.to_thread(_token_encoding)
+    
+    def _estimate_tokens(self, text: str) -> int:
+        encoding = _token_encoding()
+        if encoding is None:
+            return len(text) // CHARS_PER_TOKEN + 1
+        return len(encoding.encode(text, disallowed_special=()))
+    
+    def _search(
+        self,
+        chatbot_id: str,
+        query: str,
+        limit: int,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> List[Dict[str, Any]]:
+        """Vector search through the query result cache"""
+        
+        results = self._result_cache.get(chatbot_id, query, limit)
+        if results is None:
+            if query_embedding is not None:
+                results = self.vector_service.search_similar_with_embedding(chatbot_id, query_embedding, limit)
+            else:
+                results = self.vector_service.search_similar(chatbot_id=chatbot_id, query=query, limit=limit)
+            self._result_cache.put(chatbot_id, query, limit, results)
+        return results
+    
+    def _needs_query_rewrite(self, query: str) -> bool:
+        """Whether the query is too short or too context-dependent to search directly"""
+        
+        tokens = _WORD.findall(query.lower())
+        return len(tokens) < MIN_DIRECT_QUERY_TOKENS or not _DEICTIC_WORDS.isdisjoint(tokens)
+    
+    async def _request_retrieval_plan(self, chatbot_id: str, query: str, session_id: Optional[str]) -> Any:
+        """Ask Gemini to plan a retrieval query as a search tool call"""
+        
+        logger.info(f"Requesting Gemini to generate a retrieval query for chatbot {chatbot_id} (user query preview: {query[:100]})")
+
+        # Prompt Gemini to generate a concise retrieval query and call the tool
+        retrieval_prompt = f"""
+You are a search planner for an API documentation assistant.
+User asked: "{query}"
+
+Produce a concise search query that will return relevant documentation sections (endpoints, operations, descriptions) which can be used to answer the user's question. Call the tool `search_documentation` with the generated query.
+
+Only call the tool with a short, focused query string.
+"""
+
+        # Request function call metadata instead of executing it directly
+        async with self._llm_sem:
+            return await self.llm_service.generate_response(
+                prompt=retrieval_prompt,
+                chatbot_id=chatbot_id,
+                session_id=session_id or f"{chatbot_id}:retrieval",
+                return_function_call=True
+            )
+    
+    async def _run_retrieval_plan(
+        self,
+        llm_action: Any,
+        chatbot_id: str,
+        query: str,
+        speculative_results: Optional[List[Dict[str, Any]]]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Execute Gemini's planned tool call; None means fall back to the direct search"""
+
+        if not (isinstance(llm_action, dict) and llm_action.get("action") == "function_call"):
+            logger.info("LLM did not return a function action; using direct vector search")
+            return None
+
+        func_name = llm_action.get("function_name")
+        func_args = llm_action.get("function_args", {})
+        logger.info(f"LLM requested tool '{func_name}' with args: {func_args}")
+
+        # Only allow approved tools
+        if not is_tool_allowed_for_chatbot(func_name, chatbot_id):
+            logger.warning(f"Tool {func_name} not allowed for chatbot {chatbot_id}")
+            return None
+
+        tool_fn = get_tool_function(func_name)
+        if not tool_fn:
+            return None
+
+        planned_query = func_args.get("query", "")
+        if func_name == "search_documentation" and speculative_results is not None \
+                and self._query_similarity(planned_query, query) >= PLANNED_QUERY_REUSE_SIMILARITY:
+            logger.info("Planned query is close to the user query; reusing speculative search results")
+            return speculative_results
+
+        # Inject chatbot_id if needed
+        if tool_accepts_chatbot_id(func_name):
+            func_args['chatbot_id'] = chatbot_id
+
+        try:
+            if is_async_tool(func_name):
+                tool_result = await tool_fn(**func_args)
+            else:
+                tool_result = await asyncio.to_thread(tool_fn, **func_args)
+        except Exception as e:
+            logger.error(f"Error executing tool {func_name}: {e}")
+            return None
+
+        # Expect structured result {results: [...]}
+        if isinstance(tool_result, dict) and 'results' in tool_result:
+            return tool_result['results']
+
+        logger.info("Tool returned non-structured results, falling back to vector search")
+        return None
+    
+    def _query_similarity(self, first: str, second: str) -> float:
+        """Jaccard similarity of the two queries' word sets"""
+        
+        first_words = set(_WORD.findall(first.lower()))
+        second_words = set(_WORD.findall(second.lower()))
+        if not first_words or not second_words:
+            return 0.0
+        return len(first_words & second_words) / len(first_words | second_words)
     
     def _create_enhanced_rag_prompt(self, query: str, context: str) -> str:
         """Create enhanced RAG prompt with context"""
@@ -211,35 +477,15 @@ RESPONSE:"""
         
         return prompt
     
-    async def _handle_action_request(self, action_response: Dict[str, Any], chatbot_id: str, original_query: str, session_id: Optional[str]) -> Dict[str, Any]:
-        """Handle action requests from Gemini (more context, tool usage, etc.)"""
+    def _handle_action_request(self, action_response: Dict[str, Any], original_query: str, session_id: Optional[str]) -> Dict[str, Any]:
+        """Handle action requests from Gemini that the refinement loop does not resolve"""
         
         action = action_response.get("action")
         
         if action == "request_more_context":
-            # Get more context with refined query
-            new_query = action_response.get("query", original_query)
-            logger.info(f"Gemini requested more context with query: {new_query}")
-            
-            # Search again with refined query
-            refined_results = self.vector_service.search_similar(
-                chatbot_id=chatbot_id,
-                query=new_query,
-                limit=10  # More results for refined search
-            )
-            
-            if refined_results:
-                # Try again with new context
-                return await self.generate_response(chatbot_id, original_query, session_id, max_context_chunks=10)
-            else:
-                return {
-                    "response": f"I couldn't find relevant information in the documentation for '{original_query}'. The documentation may not cover this topic, or you might need to rephrase your question with different keywords.",
-                    "sources": [],
-                    "context_used": False,
-                    "session_id": session_id,
-                    "action_attempted": "request_more_context",
-                    "refined_query": new_query
-                }
+            # Refinements exhausted
+            refined_query = action_response.get("query", original_query)
+            return self._no_refined_context_response(original_query, refined_query, session_id)
         
         else:
             # Unknown action - just return the response as is
@@ -251,14 +497,35 @@ RESPONSE:"""
                 "unknown_action": action_response
             }
     
+    def _no_refined_context_response(self, original_query: str, refined_query: str, session_id: Optional[str]) -> Dict[str, Any]:
+        return {
+            "response": f"I couldn't find relevant information in the documentation for '{original_query}'. The documentation may not cover this topic, or you might need to rephrase your question with different keywords.",
+            "sources": [],
+            "context_used": False,
+            "session_id": session_id,
+            "action_attempted": "request_more_context",
+            "refined_query": refined_query
+        }
+    
     async def get_chatbot_knowledge_stats(self, chatbot_id: str) -> Dict[str, Any]:
         """Get statistics about chatbot's knowledge base"""
         
+        now = time.monotonic()
+        
         # Get collection stats from vector DB
-        collection_stats = self.vector_service.get_collection_stats(chatbot_id)
+        cached = self._stats_cache.get(chatbot_id)
+        if cached and now - cached[0] < COLLECTION_STATS_TTL_SECONDS:
+            collection_stats = cached[1]
+        else:
+            collection_stats = await asyncio.to_thread(self.vector_service.get_collection_stats, chatbot_id)
+            self._stats_cache[chatbot_id] = (now, collection_stats)
         
         # Get LLM service info
-        llm_info = await self.llm_service.get_model_info()
+        if self._llm_info_cache and now - self._llm_info_cache[0] < LLM_INFO_TTL_SECONDS:
+            llm_info = self._llm_info_cache[1]
+        else:
+            llm_info = await self.llm_service.get_model_info()
+            self._llm_info_cache = (now, llm_info)
         
         return {
             "chatbot_id": chatbot_id,
@@ -273,14 +540,32 @@ RESPONSE:"""
             }
         }
     
+    async def warm_up(self, chatbot_ids: Optional[List[str]] = None):
+        """Load the embedding model and each chatbot's vector index before the first real query"""
+        
+        await asyncio.to_thread(warm_up_embedding_model)
+        await self._load_token_encoding()
+        
+        if chatbot_ids is None:
+            collections = await asyncio.to_thread(self.vector_service.list_chatbot_collections)
+            # Collections without a chatbot_id in their metadata cannot be mapped back to a chatbot
+            chatbot_ids = [collection["chatbot_id"] for collection in collections if collection["chatbot_id"] != "unknown"]
+        
+        # Straight to the vector service so the dummy query never lands in the result cache;
+        # only existing collections are opened, nothing is created or migrated at startup
+        warmed = 0
+        for chatbot_id in chatbot_ids:
+            warmed += await asyncio.to_thread(self.vector_service.warm_up_collection, chatbot_id)
+        
+        # Local only: discovers tools and fills the LLM info cache without a Gemini round trip
+        self._llm_info_cache = (time.monotonic(), await self.llm_service.get_model_info())
+        
+        logger.info(f"RAG service warmed up for {warmed} chatbots")
+    
     def test_retrieval(self, chatbot_id: str, query: str, limit: int = 5) -> Dict[str, Any]:
         """Test document retrieval without generating response (for debugging)"""
         
-        search_results = self.vector_service.search_similar(
-            chatbot_id=chatbot_id,
-            query=query,
-            limit=limit
-        )
+        search_results = self._search(chatbot_id, query, limit)
         
         return {
             "query": query,
@@ -1,15 +1,37 @@
 
 import os
 import json
-import pickle
 import re
+import atexit
+import asyncio
 from typing import List, Dict, Any, Optional
-from datetime import datetime
 import aiofiles
+import numpy as np
+import orjson
 
 from ..config import settings
 from ..models import Document, DocumentChunk
 
+_FILENAME_REPLACEMENTS = {
+    '/': '_slash_',
+    '\\': '_backslash_',
+    ':': '_colon_',
+    '*': '_star_',
+    '?': '_question_',
+    '"': '_quote_',
+    '<': '_lt_',
+    '>': '_gt_',
+    '|': '_pipe_',
+    '#': '_hash_',
+    '{': '_lbrace_',
+    '}': '_rbrace_',
+    '[': '_lbracket_',
+    ']': '_rbracket_',
+    ' ': '_space_'
+}
+# Single-pass matcher for every character in _FILENAME_REPLACEMENTS
+_UNSAFE_FILENAME_CHARS = re.compile("[" + re.escape("".join(_FILENAME_REPLACEMENTS)) + "]")
+
 
 class LocalStorageService:
     
@@ -18,62 +40,57 @@ class LocalStorageService:
         self.chunks_path = os.path.join(settings.LOCAL_STORAGE_PATH, "chunks")
         self.embeddings_path = os.path.join(settings.LOCAL_STORAGE_PATH, "embeddings")
         self.mapping_file = os.path.join(settings.LOCAL_STORAGE_PATH, "id_mapping.json")
+        self.chunk_index_file = os.path.join(settings.LOCAL_STORAGE_PATH, "chunk_index.json")
         
         os.makedirs(self.documents_path, exist_ok=True)
         os.makedirs(self.chunks_path, exist_ok=True)
         os.makedirs(self.embeddings_path, exist_ok=True)
         
-        self.id_mapping = self._load_id_mapping()
+        self.id_mapping: Dict[str, str] = self._load_index(self.mapping_file)
+        self._mapping_dirty = False
+        # document_id -> ids of the chunks stored in that document's JSONL file
+        self.chunk_index: Dict[str, List[str]] = self._load_index(self.chunk_index_file)
+        
+        # New id mappings are flushed once per save rather than once per id; catch any left over at exit
+        atexit.register(self._flush_id_mapping)
     
     def _sanitize_filename(self, filename: str) -> str:
-        replacements = {
-            '/': '_slash_',
-            '\\': '_backslash_',
-            ':': '_colon_',
-            '*': '_star_',
-            '?': '_question_',
-            '"': '_quote_',
-            '<': '_lt_',
-            '>': '_gt_',
-            '|': '_pipe_',
-            '#': '_hash_',
-            '{': '_lbrace_',
-            '}': '_rbrace_',
-            '[': '_lbracket_',
-            ']': '_rbracket_',
-            ' ': '_space_'
-        }
-        
-        safe_filename = filename
-        for char, replacement in replacements.items():
-            safe_filename = safe_filename.replace(char, replacement)
+        safe_filename = _UNSAFE_FILENAME_CHARS.sub(lambda match: _FILENAME_REPLACEMENTS[match.group(0)], filename)
         
         if len(safe_filename) > 200:
             safe_filename = safe_filename[:200]
         
         return safe_filename
     
-    def _load_id_mapping(self) -> Dict[str, str]:
+    def _load_index(self, file_path: str) -> Dict[str, Any]:
         try:
-            if os.path.exists(self.mapping_file):
-                with open(self.mapping_file, 'r') as f:
+            if os.path.exists(file_path):
+                with open(file_path, 'r') as f:
                     return json.load(f)
         except Exception as e:
-            print(f"Error loading ID mapping: {str(e)}")
+            print(f"Error loading index {file_path}: {str(e)}")
         return {}
     
-    def _save_id_mapping(self):
+    def _save_index(self, file_path: str, index: Dict[str, Any]):
         try:
-            with open(self.mapping_file, 'w') as f:
-                json.dump(self.id_mapping, f, indent=2)
+            with open(file_path, 'w') as f:
+                json.dump(index, f, indent=2)
         except Exception as e:
-            print(f"Error saving ID mapping: {str(e)}")
+            print(f"Error saving index {file_path}: {str(e)}")
+    
+    def _flush_id_mapping(self):
+        if self._mapping_dirty:
+            self._save_index(self.mapping_file, self.id_mapping)
+            self._mapping_dirty = False
+    
+    def _save_chunk_index(self):
+        self._save_index(self.chunk_index_file, self.chunk_index)
     
     def _get_safe_filename(self, original_id: str) -> str:
         if original_id not in self.id_mapping:
             safe_filename = self._sanitize_filename(original_id)
             self.id_mapping[original_id] = safe_filename
-            self._save_id_mapping()
+            self._mapping_dirty = True
         return self.id_mapping[original_id]
     
     async def save_document(self, document: Document) -> bool:
@@ -81,13 +98,13 @@ class LocalStorageService:
             safe_filename = self._get_safe_filename(document.id)
             file_path = os.path.join(self.documents_path, f"{safe_filename}.json")
             
-            doc_dict = document.dict()
-            doc_dict['created_at'] = doc_dict['created_at'].isoformat() if doc_dict['created_at'] else None
-            doc_dict['updated_at'] = doc_dict['updated_at'].isoformat() if doc_dict['updated_at'] else None
+            # orjson writes datetimes as ISO 8601 itself; pydantic parses them back on load
+            data = orjson.dumps(document.model_dump(), option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
             
-            async with aiofiles.open(file_path, 'w') as f:
-                await f.write(json.dumps(doc_dict, indent=2, ensure_ascii=False))
+            async with aiofiles.open(file_path, 'wb') as f:
+                await f.write(data)
             
+            self._flush_id_mapping()
             return True
         except Exception as e:
             print(f"Error saving document {document.id}: {str(e)}")
@@ -101,14 +118,8 @@ class LocalStorageService:
             if not os.path.exists(file_path):
                 return None
             
-            async with aiofiles.open(file_path, 'r') as f:
-                content = await f.read()
-                doc_dict = json.loads(content)
-            
-            if doc_dict.get('created_at'):
-                doc_dict['created_at'] = datetime.fromisoformat(doc_dict['created_at'])
-            if doc_dict.get('updated_at'):
-                doc_dict['updated_at'] = datetime.fromisoformat(doc_dict['updated_at'])
+            async with aiofiles.open(file_path, 'rb') as f:
+                doc_dict = orjson.loads(await f.read())
             
             return Document(**doc_dict)
         except Exception as e:
@@ -129,17 +140,42 @@ class LocalStorageService:
         
         return documents
     
+    def _chunk_file_path(self, document_id: str) -> str:
+        safe_filename = self._get_safe_filename(document_id)
+        return os.path.join(self.chunks_path, f"{safe_filename}.jsonl")
+    
+    async def _read_chunk_file(self, document_id: str) -> List[Dict[str, Any]]:
+        file_path = self._chunk_file_path(document_id)
+        if not os.path.exists(file_path):
+            return []
+        
+        async with aiofiles.open(file_path, 'rb') as f:
+            content = await f.read()
+        
+        return [orjson.loads(line) for line in content.splitlines() if line]
+    
     async def save_chunks(self, chunks: List[DocumentChunk]) -> bool:
         try:
+            # One JSONL file per document, written in a single call
+            chunks_by_document: Dict[str, List[DocumentChunk]] = {}
             for chunk in chunks:
-                safe_filename = self._get_safe_filename(chunk.id)
-                file_path = os.path.join(self.chunks_path, f"{safe_filename}.json")
+                chunks_by_document.setdefault(chunk.document_id, []).append(chunk)
+            
+            for document_id, document_chunks in chunks_by_document.items():
+                # Previously stored chunks are kept unless replaced by id
+                stored = {}
+                if document_id in self.chunk_index:
+                    stored = {chunk_dict['id']: chunk_dict for chunk_dict in await self._read_chunk_file(document_id)}
+                for chunk in document_chunks:
+                    stored[chunk.id] = chunk.model_dump(mode="json")
                 
-                chunk_dict = chunk.dict()
+                async with aiofiles.open(self._chunk_file_path(document_id), 'wb') as f:
+                    await f.write(b''.join(orjson.dumps(chunk_dict) + b'\n' for chunk_dict in stored.values()))
                 
-                async with aiofiles.open(file_path, 'w') as f:
-                    await f.write(json.dumps(chunk_dict, indent=2, ensure_ascii=False))
+                self.chunk_index[document_id] = list(stored)
             
+            self._save_chunk_index()
+            self._flush_id_mapping()
             return True
         except Exception as e:
             print(f"Error saving chunks: {str(e)}")
@@ -147,15 +183,15 @@ class LocalStorageService:
     
     async def load_chunks(self, document_id: str) -> List[DocumentChunk]:
         chunks = []
+        if document_id not in self.chunk_index:
+            return chunks
+        
         try:
-            for filename in os.listdir(self.chunks_path):
-                if filename.endswith('.json'):
-                    async with aiofiles.open(os.path.join(self.chunks_path, filename), 'r') as f:
-                        content = await f.read()
-                        chunk_dict = json.loads(content)
-                    
-                    if chunk_dict.get('document_id') == document_id:
-                        chunks.append(DocumentChunk(**chunk_dict))
+            chunks = [DocumentChunk(**chunk_dict) for chunk_dict in await self._read_chunk_file(document_id)]
+            # Re-link the stored parent so chunk.document resolves its title, URL and type
+            document = await self.load_document(document_id)
+            for chunk in chunks:
+                chunk._document = document
         except Exception as e:
             print(f"Error loading chunks for document {document_id}: {str(e)}")
         
@@ -163,31 +199,42 @@ class LocalStorageService:
     
     async def save_embeddings(self, embeddings: Dict[str, List[float]]) -> bool:
         try:
-            file_path = os.path.join(self.embeddings_path, "embeddings.pkl")
-            
-            with open(file_path, 'wb') as f:
-                pickle.dump(embeddings, f)
-            
+            # Serializing a large matrix would stall the event loop, so it runs on a worker thread
+            await asyncio.to_thread(self._sync_save_embeddings, embeddings)
             return True
         except Exception as e:
             print(f"Error saving embeddings: {str(e)}")
             return False
     
-    async def load_embeddings(self) -> Dict[str, List[float]]:
+    async def load_embeddings(self) -> Dict[str, np.ndarray]:
         try:
-            file_path = os.path.join(self.embeddings_path, "embeddings.pkl")
-            
-            if not os.path.exists(file_path):
-                return {}
-            
-            with open(file_path, 'rb') as f:
-                embeddings = pickle.load(f)
-            
-            return embeddings
+            return await asyncio.to_thread(self._sync_load_embeddings)
         except Exception as e:
             print(f"Error loading embeddings: {str(e)}")
             return {}
     
+    def _sync_save_embeddings(self, embeddings: Dict[str, List[float]]):
+        # float16 matrix plus a parallel id list instead of a pickled dict of Python floats
+        vectors = np.asarray(list(embeddings.values()), dtype=np.float16)
+        np.save(os.path.join(self.embeddings_path, "embeddings.npy"), vectors)
+        
+        with open(os.path.join(self.embeddings_path, "ids.json"), 'w') as f:
+            json.dump(list(embeddings.keys()), f)
+    
+    def _sync_load_embeddings(self) -> Dict[str, np.ndarray]:
+        vectors_path = os.path.join(self.embeddings_path, "embeddings.npy")
+        ids_path = os.path.join(self.embeddings_path, "ids.json")
+        
+        if not os.path.exists(vectors_path) or not os.path.exists(ids_path):
+            return {}
+        
+        with open(ids_path, 'r') as f:
+            ids = json.load(f)
+        
+        # Rows are read-only float16 views into the memory-mapped file; upcast where fp32 math is needed
+        vectors = np.load(vectors_path, mmap_mode='r')
+        return dict(zip(ids, vectors))
+    
     async def delete_document(self, document_id: str) -> bool:
         try:
             safe_filename = self._get_safe_filename(document_id)
@@ -195,19 +242,17 @@ class LocalStorageService:
             if os.path.exists(doc_path):
                 os.remove(doc_path)
             
-            for filename in os.listdir(self.chunks_path):
-                if filename.endswith('.json'):
-                    chunk_path = os.path.join(self.chunks_path, filename)
-                    async with aiofiles.open(chunk_path, 'r') as f:
-                        content = await f.read()
-                        chunk_dict = json.loads(content)
-                    
-                    if chunk_dict.get('document_id') == document_id:
-                        os.remove(chunk_path)
+            if document_id in self.chunk_index:
+                chunk_path = self._chunk_file_path(document_id)
+                if os.path.exists(chunk_path):
+                    os.remove(chunk_path)
+                del self.chunk_index[document_id]
+                self._save_chunk_index()
             
             if document_id in self.id_mapping:
                 del self.id_mapping[document_id]
-                self._save_id_mapping()
+                self._mapping_dirty = True
+            self._flush_id_mapping()
             
             return True
         except Exception as e:
@@ -217,7 +262,7 @@ class LocalStorageService:
     async def get_storage_stats(self) -> Dict[str, Any]:
         try:
             doc_count = len([f for f in os.listdir(self.documents_path) if f.endswith('.json')])
-            chunk_count = len([f for f in os.listdir(self.chunks_path) if f.endswith('.json')])
+            chunk_count = sum(len(chunk_ids) for chunk_ids in self.chunk_index.values())
             
             total_size = 0
             for root, dirs, files in os.walk(settings.LOCAL_STORAGE_PATH):
@@ -1,6 +1,7 @@
 
 import importlib
 import inspect
+import threading
 from typing import List, Dict, Any, Callable, Set
 import logging
 
@@ -8,20 +9,42 @@ logger = logging.getLogger(__name__)
 
 _tool_functions = {}
 _tool_declarations = {}
+_tool_accepts_chatbot_id = {}
+_tool_is_async = {}
 _chatbot_tool_access = {}
+_tool_names = frozenset()
+# Tool modules are imported on first use rather than when this package is imported
+_discovered = False
+_discovery_lock = threading.Lock()
+
+def _ensure_discovered():
+    global _discovered
+    if _discovered:
+        return
+    with _discovery_lock:
+        if not _discovered:
+            _discover_tools()
+            _discovered = True
 
 def register_tool(func: Callable, declaration: Dict[str, Any]):
+    global _tool_names
     _tool_functions[declaration["name"]] = func
+    _tool_names = _tool_names | {declaration["name"]}
     _tool_declarations[declaration["name"]] = declaration
+    _tool_accepts_chatbot_id[declaration["name"]] = 'chatbot_id' in inspect.signature(func).parameters
+    _tool_is_async[declaration["name"]] = inspect.iscoroutinefunction(func)
     logger.info(f"Registered tool: {declaration['name']}")
 
 def get_all_tool_functions() -> Dict[str, Callable]:
+    _ensure_discovered()
     return _tool_functions.copy()
 
 def get_all_tool_declarations() -> List[Dict[str, Any]]:
+    _ensure_discovered()
     return list(_tool_declarations.values())
 
 def get_chatbot_tool_declarations(chatbot_id: str) -> List[Dict[str, Any]]:
+    _ensure_discovered()
     if chatbot_id not in _chatbot_tool_access:
         return get_all_tool_declarations()
     
@@ -29,36 +52,43 @@ def get_chatbot_tool_declarations(chatbot_id: str) -> List[Dict[str, Any]]:
     return [decl for name, decl in _tool_declarations.items() if name in allowed_tools]
 
 def get_tool_function(name: str) -> Callable:
+    _ensure_discovered()
     return _tool_functions.get(name)
 
+def tool_accepts_chatbot_id(name: str) -> bool:
+    _ensure_discovered()
+    return _tool_accepts_chatbot_id.get(name, False)
+
+def is_async_tool(name: str) -> bool:
+    _ensure_discovered()
+    return _tool_is_async.get(name, False)
+
 def is_tool_allowed_for_chatbot(tool_name: str, chatbot_id: str) -> bool:
+    _ensure_discovered()
     if chatbot_id not in _chatbot_tool_access:
         return tool_name in _tool_functions
     
     return tool_name in _chatbot_tool_access[chatbot_id]
 
 def set_chatbot_tools(chatbot_id: str, tool_names: List[str]):
-    valid_tools = set(tool_names) & set(_tool_functions.keys())
+    _ensure_discovered()
+    valid_tools = _tool_names.intersection(tool_names)
     _chatbot_tool_access[chatbot_id] = valid_tools
     logger.info(f"Set tools for chatbot {chatbot_id}: {list(valid_tools)}")
 
 def enable_tool_for_chatbot(chatbot_id: str, tool_name: str):
+    _ensure_discovered()
     if tool_name not in _tool_functions:
         logger.warning(f"Tool {tool_name} not found")
         return False
     
-    if chatbot_id not in _chatbot_tool_access:
-        _chatbot_tool_access[chatbot_id] = set(_tool_functions.keys())
-    
-    _chatbot_tool_access[chatbot_id].add(tool_name)
+    _chatbot_tool_access[chatbot_id] = _chatbot_tool_access.get(chatbot_id, _tool_names) | {tool_name}
     logger.info(f"Enabled tool {tool_name} for chatbot {chatbot_id}")
     return True
 
 def disable_tool_for_chatbot(chatbot_id: str, tool_name: str):
-    if chatbot_id not in _chatbot_tool_access:
-        _chatbot_tool_access[chatbot_id] = set(_tool_functions.keys())
-    
-    _chatbot_tool_access[chatbot_id].discard(tool_name)
+    _ensure_discovered()
+    _chatbot_tool_access[chatbot_id] = _chatbot_tool_access.get(chatbot_id, _tool_names) - {tool_name}
     logger.info(f"Disabled tool {tool_name} for chatbot {chatbot_id}")
 
 def get_chatbot_tool_status() -> Dict[str, List[str]]:
@@ -94,13 +124,13 @@ def _discover_tools():
         except Exception as e:
             logger.error(f"Error discovering tools in {module_name}: {e}")
 
-_discover_tools()
-
-__all__ = list(_tool_functions.keys()) + [
+__all__ = [
     "get_all_tool_functions",
     "get_all_tool_declarations", 
     "get_chatbot_tool_declarations",
     "get_tool_function",
+    "tool_accepts_chatbot_id",
+    "is_async_tool",
     "register_tool",
     "is_tool_allowed_for_chatbot",
     "set_chatbot_tools",
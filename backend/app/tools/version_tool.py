@@ -1,12 +1,17 @@
 """Version information tool for retrieving API version details from documentation."""
 
+import asyncio
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# chatbot_id -> (collection version, result); a version bump from add/clear/delete invalidates it
+_version_info_cache: Dict[str, Tuple[int, str]] = {}
 
-def get_api_version_info(chatbot_id: str = "default") -> str:
+
+async def get_api_version_info(chatbot_id: str = "default") -> str:
     """
     Get API version information from the documentation database.
     
@@ -22,38 +27,56 @@ def get_api_version_info(chatbot_id: str = "default") -> str:
         
         vector_service = get_chroma_service()
         
-        # Search for version-related content
-        version_queries = [
-            "API version versions supported",
-            "v1 v2 v3 version compatibility",
-            "current version latest version"
-        ]
+        collection_version = vector_service.get_collection_version(chatbot_id)
+        cached = _version_info_cache.get(chatbot_id)
+        if cached and cached[0] == collection_version:
+            return cached[1]
         
-        all_results = []
-        for query in version_queries:
-            results = vector_service.search_similar(
-                chatbot_id=chatbot_id,
-                query=query,
-                limit=2
-            )
-            all_results.extend(results)
+        result = await _search_version_info(vector_service, chatbot_id)
+        _version_info_cache[chatbot_id] = (collection_version, result)
+        return result
         
-        if all_results:
-            # Extract version information from results
-            version_info = []
-            for result in all_results[:3]:  # Top 3 results
-                content = result.get('content', '')[:200] + "..." if len(result.get('content', '')) > 200 else result.get('content', '')
-                version_info.append(content)
-            
-            return f"Version information found: {' | '.join(version_info)}"
-        else:
-            return f"No version information found for chatbot '{chatbot_id}'. Documentation may need to be ingested first."
-            
     except Exception as e:
         logger.error(f"Error retrieving version information: {str(e)}")
         return f"Error retrieving version information: {str(e)}"
 
 
+async def _search_version_info(vector_service, chatbot_id: str) -> str:
+    no_info = f"No version information found for chatbot '{chatbot_id}'. Documentation may need to be ingested first."
+    
+    # Nothing to search in an empty collection
+    stats = await asyncio.to_thread(vector_service.get_collection_stats, chatbot_id)
+    if stats.get("document_count", 0) == 0:
+        return no_info
+    
+    # Search for version-related content
+    version_queries = [
+        "API version versions supported",
+        "v1 v2 v3 version compatibility",
+        "current version latest version"
+    ]
+    
+    # The three phrasings cover one neighbourhood, so search once with their normalized mean
+    embeddings = await asyncio.to_thread(vector_service.encode_cached, version_queries)
+    fused = embeddings.mean(axis=0)
+    fused /= np.linalg.norm(fused)
+    
+    all_results = await asyncio.to_thread(
+        vector_service.search_similar_with_embedding, chatbot_id=chatbot_id, embedding=fused, limit=3
+    )
+    
+    if not all_results:
+        return no_info
+    
+    # Extract version information from results
+    version_info = []
+    for result in all_results[:3]:  # Top 3 results
+        content = result.get('content', '')[:200] + "..." if len(result.get('content', '')) > 200 else result.get('content', '')
+        version_info.append(content)
+    
+    return f"Version information found: {' | '.join(version_info)}"
+
+
 # Gemini tool declaration
 GEMINI_TOOL_DECLARATION = {
     "name": "get_api_version_info",
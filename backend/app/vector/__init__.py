@@ -1,4 +1,4 @@
 
-from .chroma_service import ChromaVectorService, get_chroma_service
+from .chroma_service import ChromaVectorService, get_chroma_service, get_embedding_model, warm_up_embedding_model
 
-__all__ = ["ChromaVectorService", "get_chroma_service"]
\ No newline at end of file
+__all__ = ["ChromaVectorService", "get_chroma_service", "get_embedding_model", "warm_up_embedding_model"]
\ No newline at end of file
@@ -5,16 +5,113 @@ Provides isolated collections per chatbot with embedding and similarity search
 
 import os
 import uuid
-from typing import List, Dict, Optional, Any
+import sqlite3
+import atexit
+import asyncio
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Any, Tuple
+import numpy as np
 import chromadb
 from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
 import logging
 
+from ..config import settings
 from ..models import Document, DocumentChunk
+from .quantized_store import QuantizedStoreRegistry, Float16VectorFile, RERANK_FACTOR
+from .faiss_index import FaissIndexManager, FAISS_MIN_VECTORS
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_CACHE_SIZE = 4096
+
+# Collections use inner-product space; embeddings are unit length, so 1 - distance is cosine
+COLLECTION_SPACE = "ip"
+_MIGRATION_PAGE_SIZE = 5_000
+
+# Collections up to this size are searched over their int8 sidecar instead of HNSW
+# (exact when small, binary-prefiltered past BINARY_PREFILTER_MIN_VECTORS); FAISS takes over above
+QUANTIZED_SEARCH_MAX_VECTORS = FAISS_MIN_VECTORS
+
+# Batch size for a single in-process encode call
+ENCODE_BATCH_SIZE = 128
+
+# Ingest batches this large are embedded across CPU worker processes, in sub-batches.
+# Each worker holds its own model copy, so the pool is capped, and the cores are split
+# between workers instead of every worker starting one intra-op thread per core
+ENCODE_POOL_MAX_WORKERS = 4
+ENCODE_POOL_WORKERS = min(ENCODE_POOL_MAX_WORKERS, max(1, (os.cpu_count() or 2) // 2))
+ENCODE_POOL_THREADS = max(1, (os.cpu_count() or 1) // ENCODE_POOL_WORKERS)
+ENCODE_POOL_MIN_TEXTS = 256
+ENCODE_POOL_BATCH_SIZE = 64
+
+# Per-process model for the encode pool
+_worker_model = None
+
+def _encode_worker_init(onnx_path: Optional[str], num_threads: int):
+    global _worker_model
+    if onnx_path:
+        from .onnx_embedding import OnnxEmbeddingModel
+        _worker_model = OnnxEmbeddingModel(onnx_path, intra_op_threads=num_threads)
+    else:
+        import torch
+        torch.set_num_threads(num_threads)
+        _worker_model = SentenceTransformer('all-MiniLM-L6-v2', device="cpu")
+
+def _encode_worker(texts: List[str]) -> np.ndarray:
+    return _worker_model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+
+def _migration_names(collection_name: str) -> Tuple[str, str]:
+    """Names for the migrated copy and the pre-migration original; unique per collection, never 'chatbot-' prefixed"""
+    digest = hashlib.md5(collection_name.encode()).hexdigest()[:16]
+    return f"migrate-{digest}-new", f"migrate-{digest}-old"
+
+def _embedding_device() -> str:
+    """Best available torch device for the SentenceTransformer model"""
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return "cuda"
+        if torch.backends.mps.is_available():
+            return "mps"
+    except Exception:
+        pass
+    return "cpu"
+
+# Process-wide embedding model, shared by every service that embeds text
+_embedding_model = None
+_embedding_model_device = "cpu"
+_embedding_model_lock = threading.Lock()
+
+def get_embedding_model():
+    """
+    Load the embedding model once: int8 ONNX when one is configured and loads,
+    otherwise FP32 SentenceTransformer on the best available device
+    """
+    global _embedding_model, _embedding_model_device
+    with _embedding_model_lock:
+        if _embedding_model is None:
+            if settings.EMBEDDING_ONNX_PATH:
+                try:
+                    from .onnx_embedding import OnnxEmbeddingModel
+                    _embedding_model = OnnxEmbeddingModel(settings.EMBEDDING_ONNX_PATH)
+                except Exception as e:
+                    logger.warning(f"Falling back to SentenceTransformer, ONNX embedding model failed to load: {e}")
+            if _embedding_model is None:
+                _embedding_model_device = _embedding_device()
+                logger.info(f"Loading SentenceTransformer embedding model on {_embedding_model_device}")
+                _embedding_model = SentenceTransformer('all-MiniLM-L6-v2', device=_embedding_model_device)
+        return _embedding_model
+
+def warm_up_embedding_model():
+    """Run one throwaway encode so kernels are initialized before the first real request"""
+    get_embedding_model().encode(["warmup"], convert_to_numpy=True)
+
+
 class ChromaVectorService:
     """
     Vector database service using ChromaDB for document storage and retrieval
@@ -35,15 +132,141 @@ class ChromaVectorService:
             )
         )
         
-        # Initialize embedding model (lightweight and good quality)
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Shared embedding model (lightweight and good quality)
+        self.embedding_model = get_embedding_model()
+        self.embedding_device = _embedding_model_device
+        
+        # float16 embeddings keyed by a hash of the text, persisted across restarts
+        self._embedding_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._embedding_cache_lock = threading.Lock()
+        # Separate files per backend: int8 and FP32 vectors for the same text differ slightly
+        cache_file = "embedding_cache.npz" if isinstance(self.embedding_model, SentenceTransformer) else "embedding_cache_onnx.npz"
+        self._embedding_cache_path = os.path.join(data_dir, cache_file)
+        self._load_embedding_cache()
+        atexit.register(self._save_embedding_cache)
+        
+        # Bumped whenever a collection's contents change, so callers can key caches on it
+        self._collection_versions: Dict[str, int] = {}
+        
+        self._migration_lock = threading.Lock()
+        
+        # Per-chatbot collection names and handles; handles are dropped when a collection is deleted
+        self._collection_names: Dict[str, str] = {}
+        self._collections: Dict[str, Any] = {}
+        
+        self._encode_pool: Optional[ProcessPoolExecutor] = None
+        self._encode_pool_lock = threading.Lock()
+        
+        self.quantized_stores = QuantizedStoreRegistry(os.path.join(data_dir, "int8"))
+        self.fp16_vectors = QuantizedStoreRegistry(os.path.join(data_dir, "fp16"), Float16VectorFile, "")
+        self.faiss_indexes = FaissIndexManager(os.path.join(os.path.dirname(data_dir), "faiss"))
+        atexit.register(self.faiss_indexes.flush)
+        
         logger.info(f"ChromaDB initialized at {data_dir}")
         
+    def encode_cached(self, texts: List[str]) -> np.ndarray:
+        """Embed texts, running the model only on texts not already in the embedding cache"""
+        keys = [hashlib.blake2b(text.encode(), digest_size=16).digest() for text in texts]
+        
+        with self._embedding_cache_lock:
+            cached = [self._embedding_cache.get(key) for key in keys]
+            for key, vector in zip(keys, cached):
+                if vector is not None:
+                    self._embedding_cache.move_to_end(key)
+        
+        misses = [i for i, vector in enumerate(cached) if vector is None]
+        if misses:
+            encoded = self._encode([texts[i] for i in misses])
+            with self._embedding_cache_lock:
+                for i, vector in zip(misses, encoded):
+                    cached[i] = vector
+                    # Half precision halves the cache footprint; rounding error is ~1e-3 of a unit vector
+                    self._embedding_cache[keys[i]] = vector.astype(np.float16)
+                while len(self._embedding_cache) > EMBEDDING_CACHE_SIZE:
+                    self._embedding_cache.popitem(last=False)
+        
+        return np.stack(cached).astype(np.float32, copy=False) if cached else np.empty((0, 0), dtype=np.float32)
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Run the embedding model, fanning large CPU batches out to the process pool.
+        Vectors are always unit length: collections use inner-product distance and
+        similarity thresholds assume cosine scores, whatever the model's last layer
+        """
+        # A GPU already batches far faster than extra CPU processes would
+        if len(texts) < ENCODE_POOL_MIN_TEXTS or ENCODE_POOL_WORKERS < 2 or self.embedding_device != "cpu":
+            embeddings = self.embedding_model.encode(
+                texts, batch_size=ENCODE_BATCH_SIZE, show_progress_bar=False, convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+        else:
+            pool = self._get_encode_pool()
+            futures = [
+                pool.submit(_encode_worker, texts[start:start + ENCODE_POOL_BATCH_SIZE])
+                for start in range(0, len(texts), ENCODE_POOL_BATCH_SIZE)
+            ]
+            embeddings = np.concatenate([future.result() for future in futures])
+        
+        # Also covers models whose encode ignores normalize_embeddings; a no-op for unit vectors
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.clip(norms, 1e-12, None)
+    
+    def _get_encode_pool(self) -> ProcessPoolExecutor:
+        """Start the encode pool on first use; each worker loads its own copy of the model"""
+        with self._encode_pool_lock:
+            if self._encode_pool is None:
+                onnx_path = None if isinstance(self.embedding_model, SentenceTransformer) else settings.EMBEDDING_ONNX_PATH
+                # spawn: forking a process that already holds torch/BLAS threads can deadlock
+                self._encode_pool = ProcessPoolExecutor(
+                    max_workers=ENCODE_POOL_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_encode_worker_init,
+                    initargs=(onnx_path, ENCODE_POOL_THREADS)
+                )
+                atexit.register(self._encode_pool.shutdown, wait=False, cancel_futures=True)
+                logger.info(f"Started embedding process pool with {ENCODE_POOL_WORKERS} workers x {ENCODE_POOL_THREADS} threads")
+            return self._encode_pool
+    
+    def _load_embedding_cache(self):
+        try:
+            if os.path.exists(self._embedding_cache_path):
+                with np.load(self._embedding_cache_path) as saved:
+                    for key, vector in zip(saved["keys"], saved["vectors"]):
+                        self._embedding_cache[key.tobytes()] = vector.astype(np.float16, copy=False)
+        except Exception as e:
+            logger.warning(f"Failed to load embedding cache: {e}")
+    
+    def _save_embedding_cache(self):
+        try:
+            with self._embedding_cache_lock:
+                if not self._embedding_cache:
+                    return
+                keys = np.frombuffer(b"".join(self._embedding_cache.keys()), dtype=np.uint8).reshape(-1, 16)
+                vectors = np.stack(list(self._embedding_cache.values()))
+            # Write aside and rename, so a crash or a concurrent process never leaves a torn file
+            temp_path = f"{self._embedding_cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                np.savez(f, keys=keys, vectors=vectors)
+            os.replace(temp_path, self._embedding_cache_path)
+        except Exception as e:
+            logger.warning(f"Failed to save embedding cache: {e}")
+    
+    def get_collection_version(self, chatbot_id: str) -> int:
+        """In-process counter of changes to a chatbot's collection"""
+        return self._collection_versions.get(chatbot_id, 0)
+    
+    def _bump_collection_version(self, chatbot_id: str):
+        self._collection_versions[chatbot_id] = self._collection_versions.get(chatbot_id, 0) + 1
+    
     def get_collection_name(self, chatbot_id: str) -> str:
         """Generate collection name for a chatbot"""
-        # ChromaDB collection names must be 3-63 chars, alphanumeric + hyphens
-        safe_name = f"chatbot-{chatbot_id.lower().replace('_', '-')}"
-        return safe_name[:63]
+        name = self._collection_names.get(chatbot_id)
+        if name is None:
+            # ChromaDB collection names must be 3-63 chars, alphanumeric + hyphens
+            name = f"chatbot-{chatbot_id.lower().replace('_', '-')}"[:63]
+            self._collection_names[chatbot_id] = name
+        return name
     
     def create_chatbot_collection(self, chatbot_id: str) -> str:
         """Create a new collection for a chatbot"""
@@ -52,7 +275,7 @@ class ChromaVectorService:
         try:
             collection = self.client.create_collection(
                 name=collection_name,
-                metadata={"chatbot_id": chatbot_id}
+                metadata={"chatbot_id": chatbot_id, "hnsw:space": COLLECTION_SPACE}
             )
             logger.info(f"Created collection '{collection_name}' for chatbot {chatbot_id}")
             return collection_name
@@ -63,14 +286,130 @@ class ChromaVectorService:
     
     def get_chatbot_collection(self, chatbot_id: str):
         """Get existing collection for a chatbot"""
+        collection = self._collections.get(chatbot_id)
+        if collection is not None:
+            return collection
+        
         collection_name = self.get_collection_name(chatbot_id)
         try:
-            return self.client.get_collection(collection_name)
+            collection = self.client.get_collection(collection_name)
         except Exception as e:
             logger.error(f"Failed to get collection for chatbot {chatbot_id}: {e}")
             # Create collection if it doesn't exist
             self.create_chatbot_collection(chatbot_id)
-            return self.client.get_collection(collection_name)
+            collection = self.client.get_collection(collection_name)
+        
+        # Collections still in the old l2 space keep serving (_query rescales their distances)
+        # until migrate_to_inner_product converts them offline
+        self._collections[chatbot_id] = collection
+        return collection
+    
+    def warm_up_collection(self, chatbot_id: str) -> bool:
+        """
+        Load an existing collection's index with one throwaway query. Read-only: a missing
+        collection is not created and an l2 collection is not migrated
+        """
+        try:
+            collection = self.client.get_collection(self.get_collection_name(chatbot_id))
+            if collection.count():
+                self._query(collection, self.encode_cached(["warmup"]), 1)
+            return True
+        except Exception as e:
+            logger.warning(f"Skipped warm-up for chatbot {chatbot_id}: {e}")
+            return False
+    
+    def migrate_to_inner_product(self, chatbot_id: str) -> bool:
+        """
+        Convert a collection created with the old default (l2) space to inner product.
+        Offline/admin step (python -m app.vector.migrate_space), never run on a request path:
+        the data is copied to a new collection and the original is only deleted once the
+        copy holds its name and all of its vectors
+        """
+        collection_name = self.get_collection_name(chatbot_id)
+        new_name, old_name = _migration_names(collection_name)
+        
+        with self._migration_lock:
+            try:
+                self._recover_migration(collection_name)
+                
+                collection = self.client.get_collection(collection_name)
+                if (collection.metadata or {}).get("hnsw:space") == COLLECTION_SPACE:
+                    return True
+                
+                metadata = {key: value for key, value in (collection.metadata or {}).items() if not key.startswith("hnsw:")}
+                metadata["hnsw:space"] = COLLECTION_SPACE
+                migrated = self.client.create_collection(name=new_name, metadata=metadata)
+                
+                offset = 0
+                while True:
+                    page = collection.get(
+                        include=["embeddings", "documents", "metadatas"],
+                        limit=_MIGRATION_PAGE_SIZE,
+                        offset=offset
+                    )
+                    if not page["ids"]:
+                        break
+                    migrated.add(
+                        ids=page["ids"],
+                        embeddings=page["embeddings"],
+                        documents=page["documents"],
+                        metadatas=page["metadatas"]
+                    )
+                    offset += len(page["ids"])
+                
+                count = collection.count()
+                if migrated.count() != count:
+                    raise RuntimeError(f"copied {migrated.count()} of {count} vectors")
+                
+                # Swap names; the original stays intact under old_name until the copy has taken over
+                collection.modify(name=old_name)
+                try:
+                    migrated.modify(name=collection_name)
+                except Exception:
+                    collection.modify(name=collection_name)
+                    raise
+                
+                if self.client.get_collection(collection_name).count() != count:
+                    raise RuntimeError(f"migrated collection does not hold all {count} vectors, original kept as '{old_name}'")
+                self.client.delete_collection(old_name)
+                
+                self._collections.pop(chatbot_id, None)
+                logger.info(f"Migrated collection '{collection_name}' ({count} vectors) to {COLLECTION_SPACE} space")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to migrate collection '{collection_name}' to {COLLECTION_SPACE} space: {e}")
+                return False
+    
+    def _recover_migration(self, collection_name: str):
+        """Finish or roll back a migration of collection_name that was interrupted part-way"""
+        new_name, old_name = _migration_names(collection_name)
+        original = self._get_existing_collection(collection_name)
+        old = self._get_existing_collection(old_name)
+        
+        if old is not None:
+            if original is None:
+                # Stopped between the two renames: complete the swap if the copy is whole, else restore
+                new = self._get_existing_collection(new_name)
+                if new is not None and new.count() == old.count():
+                    new.modify(name=collection_name)
+                    self.client.delete_collection(old_name)
+                else:
+                    old.modify(name=collection_name)
+            elif (original.metadata or {}).get("hnsw:space") == COLLECTION_SPACE and original.count() >= old.count():
+                # Stopped after the swap, before the original was deleted
+                self.client.delete_collection(old_name)
+            else:
+                raise RuntimeError(f"both '{collection_name}' and its pre-migration copy '{old_name}' exist, resolve manually")
+        
+        # A copy left next to its intact original is only a partial one
+        if self._get_existing_collection(collection_name) is not None and self._get_existing_collection(new_name) is not None:
+            self.client.delete_collection(new_name)
+    
+    def _get_existing_collection(self, name: str):
+        try:
+            return self.client.get_collection(name)
+        except Exception:
+            return None
     
     def add_documents(self, chatbot_id: str, chunks: List[DocumentChunk]) -> bool:
         """Add document chunks to chatbot's collection"""
@@ -85,27 +424,50 @@ class ChromaVectorService:
             ids = [chunk.chunk_id for chunk in chunks]
             
             # Generate embeddings
-            embeddings = self.embedding_model.encode(texts, convert_to_tensor=False).tolist()
+            embeddings = self.encode_cached(texts)
             
             # Prepare metadata
             metadatas = []
             for chunk in chunks:
+                document = chunk.document
+                if document is not None:
+                    source_url, doc_type, title = document.url, document.doc_type.value, document.title
+                else:
+                    # No stored parent: chunks written by older versions carried copies of these fields
+                    source_url = chunk.metadata.get("document_url", "")
+                    doc_type = chunk.metadata.get("document_type", "")
+                    doc_type = getattr(doc_type, "value", doc_type)
+                    title = chunk.metadata.get("document_title", "")
+                
                 metadata = {
                     "document_id": chunk.document_id,
                     "chunk_index": chunk.chunk_index,
-                    "source_url": chunk.metadata.get("source_url", ""),
-                    "doc_type": chunk.metadata.get("doc_type", ""),
-                    "title": chunk.metadata.get("title", "")
+                    "source_url": source_url,
+                    "doc_type": doc_type,
+                    "title": title
                 }
                 metadatas.append(metadata)
             
-            # Add to collection
-            collection.add(
-                embeddings=embeddings,
-                documents=texts,
-                metadatas=metadatas,
-                ids=ids
-            )
+            # Add to collection in fixed-size sub-batches: huge calls stall, tiny ones pay per-call overhead
+            batch_size = settings.CHROMA_INGEST_BATCH
+            for start in range(0, len(ids), batch_size):
+                end = start + batch_size
+                collection.add(
+                    # ndarray straight through; Chroma's client converts it without nested Python lists
+                    embeddings=embeddings[start:end],
+                    documents=texts[start:end],
+                    metadatas=metadatas[start:end],
+                    ids=ids[start:end]
+                )
+            count = collection.count()
+            if count <= QUANTIZED_SEARCH_MAX_VECTORS:
+                self.quantized_stores.get(collection.name).add(ids, embeddings)
+            else:
+                # Past the size the int8 path serves: stop rewriting its file on every add
+                self.quantized_stores.drop(collection.name)
+            self.fp16_vectors.get(collection.name).add(ids, embeddings)
+            self._update_faiss_index(collection, ids, embeddings, count)
+            self._bump_collection_version(chatbot_id)
             
             logger.info(f"Added {len(chunks)} chunks to collection for chatbot {chatbot_id}")
             return True
@@ -114,35 +476,22 @@ class ChromaVectorService:
             logger.error(f"Failed to add documents to collection: {e}")
             return False
     
+    async def add_documents_async(self, chatbot_id: str, chunks: List[DocumentChunk]) -> bool:
+        """add_documents on a worker thread, for callers on the event loop"""
+        return await asyncio.to_thread(self.add_documents, chatbot_id, chunks)
+    
     def search_similar(self, chatbot_id: str, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Search for similar documents in chatbot's collection"""
         collection = self.get_chatbot_collection(chatbot_id)
         
         try:
             # Generate query embedding
-            query_embedding = self.embedding_model.encode([query], convert_to_tensor=False).tolist()[0]
+            query_embeddings = self.encode_cached([query])
             
             # Search collection
-            results = collection.query(
-                query_embeddings=[query_embedding],
-                n_results=limit,
-                include=["documents", "metadatas", "distances"]
-            )
+            results = self._query(collection, query_embeddings, limit)
             
-            # Format results
-            search_results = []
-            if results and results['documents']:
-                for i, (doc, metadata, distance) in enumerate(zip(
-                    results['documents'][0],
-                    results['metadatas'][0], 
-                    results['distances'][0]
-                )):
-                    search_results.append({
-                        "content": doc,
-                        "metadata": metadata,
-                        "similarity_score": 1.0 - distance,  # Convert distance to similarity
-                        "rank": i + 1
-                    })
+            search_results = self._format_query_results(results, 0)
             
             logger.info(f"Found {len(search_results)} similar documents for query")
             return search_results
@@ -151,11 +500,108 @@ class ChromaVectorService:
             logger.error(f"Search failed: {e}")
             return []
     
+    def search_similar_with_embedding(self, chatbot_id: str, embedding: np.ndarray, limit: int = 5) -> List[Dict[str, Any]]:
+        """Search with a precomputed query embedding, skipping the encode step"""
+        collection = self.get_chatbot_collection(chatbot_id)
+        
+        try:
+            results = self._query(collection, np.asarray(embedding, dtype=np.float32).reshape(1, -1), limit)
+            search_results = self._format_query_results(results, 0)
+            
+            logger.info(f"Found {len(search_results)} similar documents for embedding query")
+            return search_results
+            
+        except Exception as e:
+            logger.error(f"Search failed: {e}")
+            return []
+    
+    def _update_faiss_index(self, collection, ids: List[str], embeddings: np.ndarray, count: int):
+        """Extend (or queue into) the collection's FAISS mirror, or start building one once it is large enough"""
+        if not self.faiss_indexes.add(collection.name, ids, embeddings) and count > FAISS_MIN_VECTORS:
+            self.faiss_indexes.build_in_background(collection)
+    
+    def _query(self, collection, query_embeddings: np.ndarray, limit: int) -> Dict[str, Any]:
+        """
+        Chroma-shaped query results: exact int8 search for small collections, FAISS IVF-PQ
+        for large ones with a mirror, otherwise Chroma's HNSW index
+        """
+        count = collection.count()
+        
+        store = self.quantized_stores.get(collection.name)
+        if 0 < len(store) <= QUANTIZED_SEARCH_MAX_VECTORS and len(store) == count:
+            top_ids, scores = store.search(query_embeddings, limit)
+            return self._results_from_scores(collection, top_ids, scores)
+        
+        faiss_entry = self.faiss_indexes.get(collection.name)
+        if faiss_entry is not None:
+            if len(faiss_entry[1]) == count:
+                # PQ scores are approximate: over-fetch, then rerank exactly from the float16 file
+                vectors = self.fp16_vectors.get(collection.name)
+                if len(vectors) == count:
+                    top_ids, _ = self.faiss_indexes.search(collection.name, query_embeddings, RERANK_FACTOR * limit)
+                    top_ids, scores = vectors.rerank(top_ids, query_embeddings, limit)
+                else:
+                    top_ids, scores = self.faiss_indexes.search(collection.name, query_embeddings, limit)
+                return self._results_from_scores(collection, top_ids, scores)
+            # Out of sync with Chroma (e.g. re-added chunk ids): serve from HNSW while it rebuilds
+            self.faiss_indexes.build_in_background(collection)
+        
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        batch_size = settings.CHROMA_INGEST_BATCH
+        for start in range(0, len(query_embeddings), batch_size):
+            batch = collection.query(
+                query_embeddings=query_embeddings[start:start + batch_size],
+                n_results=limit,
+                include=["documents", "metadatas", "distances"]
+            )
+            for key in results:
+                results[key].extend(batch[key])
+        if (collection.metadata or {}).get("hnsw:space", "l2") == "l2":
+            # Not migrated yet: squared L2 between unit vectors is twice the inner-product distance
+            results["distances"] = [(np.asarray(row, dtype=np.float64) / 2.0).tolist() for row in results["distances"]]
+        return results
+    
+    def _results_from_scores(self, collection, top_ids: List[List[str]], scores: np.ndarray) -> Dict[str, Any]:
+        """Fetch text and metadata for ranked ids and shape them like collection.query output"""
+        fetched = collection.get(ids=list({i for row in top_ids for i in row}), include=["documents", "metadatas"])
+        by_id = {i: (doc, metadata) for i, doc, metadata in zip(fetched['ids'], fetched['documents'], fetched['metadatas'])}
+        
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for row_ids, row_scores in zip(top_ids, scores):
+            # One lookup per hit, then the scores are sliced and converted as a single array
+            kept = [k for k, i in enumerate(row_ids) if i in by_id]
+            ids = [row_ids[k] for k in kept]
+            entries = [by_id[i] for i in ids]
+            results["ids"].append(ids)
+            results["documents"].append([doc for doc, _ in entries])
+            results["metadatas"].append([metadata for _, metadata in entries])
+            # Inner-product distance, as Chroma reports it for COLLECTION_SPACE
+            results["distances"].append(np.subtract(1.0, np.asarray(row_scores, dtype=np.float64)[kept]).tolist())
+        return results
+    
+    def _format_query_results(self, results: Dict[str, Any], query_index: int) -> List[Dict[str, Any]]:
+        """Format one query's hits from a Chroma query response"""
+        if not results or not results['documents']:
+            return []
+        
+        documents = results['documents'][query_index]
+        metadatas = results['metadatas'][query_index]
+        # Inner-product distance to cosine similarity for the whole row in one vectorized step
+        similarities = np.subtract(1.0, np.asarray(results['distances'][query_index], dtype=np.float64)).tolist()
+        
+        return [
+            {"content": doc, "metadata": metadata, "similarity_score": similarity, "rank": rank}
+            for rank, (doc, metadata, similarity) in enumerate(zip(documents, metadatas, similarities), start=1)
+        ]
+    
     def get_collection_stats(self, chatbot_id: str) -> Dict[str, Any]:
         """Get statistics for chatbot's collection"""
         try:
-            collection = self.get_chatbot_collection(chatbot_id)
-            count = collection.count()
+            # Read-only: a missing collection has no documents, it is not created here
+            try:
+                count = self.client.get_collection(self.get_collection_name(chatbot_id)).count()
+            except Exception:
+                count = 0
             
             return {
                 "chatbot_id": chatbot_id,
@@ -169,10 +615,18 @@ class ChromaVectorService:
     
     async def clear_chatbot_data(self, chatbot_id: str) -> bool:
         """Clear all data for a chatbot (recreate collection)"""
+        return await asyncio.to_thread(self._clear_chatbot_data, chatbot_id)
+    
+    def _clear_chatbot_data(self, chatbot_id: str) -> bool:
         collection_name = self.get_collection_name(chatbot_id)
         
         try:
             # Delete existing collection
+            self._collections.pop(chatbot_id, None)
+            self._bump_collection_version(chatbot_id)
+            self.quantized_stores.drop(collection_name)
+            self.fp16_vectors.drop(collection_name)
+            self.faiss_indexes.drop(collection_name)
             try:
                 self.client.delete_collection(collection_name)
                 logger.info(f"Cleared existing collection for chatbot {chatbot_id}")
@@ -191,8 +645,9 @@ class ChromaVectorService:
         collection_name = self.get_collection_name(chatbot_id)
         
         try:
-            collection = self.client.get_collection(collection_name)
-            results = collection.get(ids=[document_id])
+            collection = await asyncio.to_thread(self.client.get_collection, collection_name)
+            # Only what is returned; embeddings would be deserialized for nothing
+            results = await asyncio.to_thread(collection.get, ids=[document_id], include=["documents", "metadatas"])
             
             if results['ids']:
                 return {
@@ -208,7 +663,7 @@ class ChromaVectorService:
     async def add_document(self, chatbot_id: str, document: Document) -> bool:
         """Add a single document to the chatbot's collection"""
         try:
-            return self.add_documents(chatbot_id, [document])
+            return await self.add_documents_async(chatbot_id, [document])
         except Exception as e:
             logger.error(f"Failed to add document: {e}")
             return False
@@ -218,6 +673,11 @@ class ChromaVectorService:
         collection_name = self.get_collection_name(chatbot_id)
         
         try:
+            self._collections.pop(chatbot_id, None)
+            self._bump_collection_version(chatbot_id)
+            self.quantized_stores.drop(collection_name)
+            self.fp16_vectors.drop(collection_name)
+            self.faiss_indexes.drop(collection_name)
             self.client.delete_collection(collection_name)
             logger.info(f"Deleted collection '{collection_name}' for chatbot {chatbot_id}")
             return True
@@ -229,15 +689,17 @@ class ChromaVectorService:
         """List all chatbot collections"""
         try:
             collections = self.client.list_collections()
+            counts = self._collection_counts()
             
             chatbot_collections = []
             for collection in collections:
                 if collection.name.startswith("chatbot-"):
                     metadata = collection.metadata or {}
+                    count = counts.get(str(collection.id)) if counts is not None else None
                     chatbot_collections.append({
                         "collection_name": collection.name,
                         "chatbot_id": metadata.get("chatbot_id", "unknown"),
-                        "document_count": collection.count()
+                        "document_count": count if count is not None else collection.count()
                     })
             
             return chatbot_collections
@@ -245,6 +707,31 @@ class ChromaVectorService:
             logger.error(f"Failed to list collections: {e}")
             return []
 
+    def _collection_counts(self) -> Optional[Dict[str, int]]:
+        """
+        Vector counts for every collection from one aggregate over Chroma's SQLite file,
+        opened read-only; None when the schema or file is not what this expects
+        """
+        db_path = os.path.join(self.data_dir, "chroma.sqlite3")
+        if not os.path.exists(db_path):
+            return None
+        
+        try:
+            connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+            try:
+                rows = connection.execute(
+                    "SELECT segments.collection, COUNT(*) FROM embeddings "
+                    "JOIN segments ON embeddings.segment_id = segments.id "
+                    "GROUP BY segments.collection"
+                ).fetchall()
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Falling back to per-collection counts: {e}")
+            return None
+        
+        return {str(collection_id): count for collection_id, count in rows}
+
 # Global service instance
 _chroma_service = None
 
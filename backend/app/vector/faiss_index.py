@@ -0,0 +1,260 @@
+"""
+FAISS IVF-PQ secondary index for large chatbot collections
+Chroma stays the source of truth; collections past FAISS_MIN_VECTORS get a compressed
+IVF-PQ mirror that search_similar routes through instead of HNSW
+"""
+
+import os
+import json
+import time
+import threading
+import logging
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FAISS_MIN_VECTORS = 100_000
+TRAINING_SAMPLE_SIZE = 100_000
+INDEX_FACTORY = "IVF1024,PQ48x8"
+NPROBE = 16
+EMBEDDING_DIM = 384
+_FETCH_PAGE_SIZE = 10_000
+# Incremental adds are persisted at most this often per collection; the rest on flush()
+SAVE_INTERVAL_SECONDS = 60
+
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    faiss = None
+    FAISS_AVAILABLE = False
+
+
+class FaissIndexManager:
+    """
+    One IVF-PQ index per collection, persisted as <data_dir>/<collection>.npz holding the
+    serialized index and the chunk ids its int64 ids map back to, written in one os.replace
+    """
+
+    def __init__(self, data_dir: str = "./data/faiss"):
+        self.data_dir = data_dir
+        os.makedirs(data_dir, exist_ok=True)
+        self._indexes: Dict[str, Optional[Tuple[object, List[str]]]] = {}
+        self._building = set()
+        # Vectors added while a collection's index is being built, applied when the build finishes
+        self._pending: Dict[str, List[Tuple[List[str], np.ndarray]]] = {}
+        # Collections with adds not yet on disk, and when each was last saved
+        self._dirty = set()
+        self._saved_at: Dict[str, float] = {}
+        # _lock guards the bookkeeping above; each index has its own lock for search and add,
+        # and _save_lock orders writes so an older snapshot never replaces a newer one
+        self._lock = threading.Lock()
+        self._index_locks: Dict[str, threading.Lock] = {}
+        self._save_lock = threading.Lock()
+
+    def get(self, collection_name: str) -> Optional[Tuple[object, List[str]]]:
+        """Loaded (index, ids) for a collection, or None when it has no FAISS mirror"""
+        if not FAISS_AVAILABLE:
+            return None
+
+        with self._lock:
+            if collection_name in self._indexes:
+                return self._indexes[collection_name]
+
+        # Read from disk without blocking lookups for other collections
+        entry = self._load(collection_name)
+        with self._lock:
+            return self._indexes.setdefault(collection_name, entry)
+
+    def search(self, collection_name: str, query_embeddings: np.ndarray, limit: int) -> Optional[Tuple[List[List[str]], np.ndarray]]:
+        """Top-limit chunk ids and inner products per query row, or None without an index"""
+        entry = self.get(collection_name)
+        if entry is None:
+            return None
+
+        index, ids = entry
+        # FAISS indexes are not safe to search while add_with_ids runs
+        with self._index_lock(collection_name):
+            index.nprobe = NPROBE
+            scores, positions = index.search(np.ascontiguousarray(query_embeddings, dtype=np.float32), limit)
+
+        # FAISS pads missing neighbours with -1
+        top_ids = [[ids[p] for p in row if p >= 0] for row in positions]
+        return top_ids, scores
+
+    def add(self, collection_name: str, chunk_ids: List[str], embeddings: np.ndarray) -> bool:
+        """
+        Append new vectors to an existing mirror (the trained quantizers are reused), or queue
+        them while one is being built. False when the collection has neither
+        """
+        entry = self.get(collection_name)
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+        with self._lock:
+            if collection_name in self._building:
+                self._pending.setdefault(collection_name, []).append((list(chunk_ids), vectors))
+                return True
+            if entry is None:
+                return False
+
+        index, ids = entry
+        with self._index_lock(collection_name):
+            self._add_vectors(index, ids, list(chunk_ids), vectors)
+
+        with self._lock:
+            self._dirty.add(collection_name)
+            due = time.monotonic() - self._saved_at.get(collection_name, 0.0) >= SAVE_INTERVAL_SECONDS
+        if due:
+            self._save(collection_name)
+        return True
+
+    def flush(self):
+        """Persist every collection with adds not yet on disk"""
+        with self._lock:
+            dirty = list(self._dirty)
+        for collection_name in dirty:
+            self._save(collection_name)
+
+    def build_in_background(self, collection):
+        """Train and fill a mirror of a Chroma collection on a daemon thread"""
+        if not FAISS_AVAILABLE:
+            return
+
+        with self._lock:
+            if collection.name in self._building:
+                return
+            self._building.add(collection.name)
+
+        threading.Thread(target=self._build, args=(collection,), daemon=True).start()
+
+    def drop(self, collection_name: str):
+        with self._lock:
+            self._indexes.pop(collection_name, None)
+            self._pending.pop(collection_name, None)
+            self._dirty.discard(collection_name)
+            self._saved_at.pop(collection_name, None)
+        with self._save_lock:
+            path = self._path(collection_name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _index_lock(self, collection_name: str) -> threading.Lock:
+        with self._lock:
+            return self._index_locks.setdefault(collection_name, threading.Lock())
+
+    def _build(self, collection):
+        try:
+            ids, vectors = self._fetch_all(collection)
+            if len(ids) < FAISS_MIN_VECTORS:
+                return
+
+            index = faiss.index_factory(EMBEDDING_DIM, INDEX_FACTORY, faiss.METRIC_INNER_PRODUCT)
+            sample = np.random.default_rng().choice(len(ids), size=min(TRAINING_SAMPLE_SIZE, len(ids)), replace=False)
+            index.train(vectors[sample])
+            index.add_with_ids(vectors, np.arange(len(ids), dtype=np.int64))
+
+            with self._lock:
+                # Adds that landed after the snapshot was read; ids already fetched are skipped
+                # so nothing is mirrored twice
+                fetched = set(ids)
+                for chunk_ids, vectors in self._pending.pop(collection.name, []):
+                    new_rows = [i for i, chunk_id in enumerate(chunk_ids) if chunk_id not in fetched]
+                    if new_rows:
+                        self._add_vectors(index, ids, [chunk_ids[i] for i in new_rows], vectors[new_rows])
+                        fetched.update(chunk_ids[i] for i in new_rows)
+
+                self._indexes[collection.name] = (index, ids)
+            self._save(collection.name)
+            logger.info(f"Built FAISS {INDEX_FACTORY} index for '{collection.name}' with {len(ids)} vectors")
+        except Exception as e:
+            logger.error(f"Failed to build FAISS index for '{collection.name}': {e}")
+        finally:
+            with self._lock:
+                self._building.discard(collection.name)
+                self._pending.pop(collection.name, None)
+
+    def _add_vectors(self, index, ids: List[str], chunk_ids: List[str], vectors: np.ndarray):
+        start = len(ids)
+        index.add_with_ids(vectors, np.arange(start, start + len(chunk_ids), dtype=np.int64))
+        ids.extend(chunk_ids)
+
+    def _fetch_all(self, collection) -> Tuple[List[str], np.ndarray]:
+        ids, batches = [], []
+        offset = 0
+        while True:
+            page = collection.get(include=["embeddings"], limit=_FETCH_PAGE_SIZE, offset=offset)
+            if not page["ids"]:
+                break
+            ids.extend(page["ids"])
+            batches.append(np.asarray(page["embeddings"], dtype=np.float32))
+            offset += len(page["ids"])
+        vectors = np.concatenate(batches) if batches else np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        return ids, vectors
+
+    def _path(self, collection_name: str) -> str:
+        return os.path.join(self.data_dir, f"{collection_name}.npz")
+
+    def _load(self, collection_name: str) -> Optional[Tuple[object, List[str]]]:
+        path = self._path(collection_name)
+        if not os.path.exists(path):
+            return self._load_legacy(collection_name)
+        try:
+            with np.load(path) as saved:
+                index = faiss.deserialize_index(saved["index"])
+                ids = saved["ids"].tolist()
+            return index, ids
+        except Exception as e:
+            logger.warning(f"Failed to load FAISS index for '{collection_name}': {e}")
+            return None
+
+    def _load_legacy(self, collection_name: str) -> Optional[Tuple[object, List[str]]]:
+        """Index and ids saved as two files by earlier versions; used only if they still agree"""
+        base = os.path.join(self.data_dir, collection_name)
+        index_path, ids_path = f"{base}.index", f"{base}.ids.json"
+        if not os.path.exists(index_path) or not os.path.exists(ids_path):
+            return None
+        try:
+            with open(ids_path, 'r') as f:
+                ids = json.load(f)
+            index = faiss.read_index(index_path)
+            if index.ntotal != len(ids):
+                raise ValueError(f"{index.ntotal} vectors for {len(ids)} ids")
+            with self._save_lock:
+                self._write(collection_name, index, ids)
+            entry = index, ids
+        except Exception as e:
+            logger.warning(f"Discarding FAISS index files for '{collection_name}': {e}")
+            entry = None
+        for path in (index_path, ids_path):
+            os.remove(path)
+        return entry
+
+    def _save(self, collection_name: str):
+        with self._save_lock:
+            with self._lock:
+                entry = self._indexes.get(collection_name)
+                self._dirty.discard(collection_name)
+                self._saved_at[collection_name] = time.monotonic()
+            if entry is None:
+                return
+
+            index, ids = entry
+            try:
+                self._write(collection_name, index, ids)
+            except Exception as e:
+                logger.error(f"Failed to save FAISS index for '{collection_name}': {e}")
+                with self._lock:
+                    self._dirty.add(collection_name)
+
+    def _write(self, collection_name: str, index, ids: List[str]):
+        # Snapshot in memory under the index lock; the disk write does not block searches
+        with self._index_lock(collection_name):
+            serialized = faiss.serialize_index(index)
+            ids = np.array(ids, dtype=str)
+
+        path = self._path(collection_name)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.savez(f, index=serialized, ids=ids)
+        os.replace(temp_path, path)
@@ -0,0 +1,35 @@
+"""
+Convert chatbot collections created in the old l2 space to inner product.
+
+Run with the server stopped, since it renames collections the server may hold open:
+
+    python -m app.vector.migrate_space [chatbot_id ...]
+
+Without arguments every chatbot collection is migrated.
+"""
+
+import sys
+
+from .chroma_service import get_chroma_service
+
+
+def main(chatbot_ids) -> int:
+    service = get_chroma_service()
+    if not chatbot_ids:
+        chatbot_ids = [
+            collection["chatbot_id"] for collection in service.list_chatbot_collections()
+            if collection["chatbot_id"] != "unknown"
+        ]
+    
+    failed = 0
+    for chatbot_id in chatbot_ids:
+        if service.migrate_to_inner_product(chatbot_id):
+            print(f"✅ {chatbot_id}")
+        else:
+            print(f"❌ {chatbot_id} (original collection kept, see log)")
+            failed += 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
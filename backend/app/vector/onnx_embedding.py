@@ -0,0 +1,96 @@
+"""
+ONNX Runtime embedding model
+Runs an int8-quantized export of all-MiniLM-L6-v2 with the same output as SentenceTransformer.encode
+"""
+
+import os
+import logging
+from typing import List, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ONNX_MODEL_FILE = "model_int8.onnx"
+BASE_MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+MAX_SEQ_LENGTH = 256
+
+class OnnxEmbeddingModel:
+    """
+    Drop-in for the SentenceTransformer encode() calls the app makes:
+    tokenizer + ONNX session, then mean pooling and L2 normalization in NumPy
+    """
+
+    def __init__(self, model_dir: str, model_file: str = ONNX_MODEL_FILE, intra_op_threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # 0 lets ONNX Runtime use every core; pool workers pass their share
+        options.intra_op_num_threads = intra_op_threads
+
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+        logger.info(f"ONNX embedding model loaded from {model_dir}")
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """Embed sentences as float32 rows; a single string gives a single vector"""
+        # all-MiniLM-L6-v2 always ends in a Normalize layer, so normalize_embeddings and
+        # the convert_to_* flags do not change the result
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        batches = []
+        for start in range(0, len(sentences), batch_size):
+            batches.append(self._encode_batch(sentences[start:start + batch_size]))
+        embeddings = np.concatenate(batches) if batches else np.empty((0, 0), dtype=np.float32)
+
+        return embeddings[0] if single else embeddings
+
+    def _encode_batch(self, sentences: List[str]) -> np.ndarray:
+        tokens = self.tokenizer(
+            sentences,
+            padding=True,
+            truncation=True,
+            max_length=MAX_SEQ_LENGTH,
+            return_tensors="np"
+        )
+        inputs = {name: value.astype(np.int64) for name, value in tokens.items() if name in self._input_names}
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        # Mean pooling over real tokens, then L2 normalization
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+def export_quantized_model(output_dir: str, model_id: str = BASE_MODEL_ID):
+    """One-off export: ONNX-convert the model and dynamically quantize it to int8 (needs optimum)"""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    model = ORTModelForFeatureExtraction.from_pretrained(model_id, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_id).save_pretrained(output_dir)
+
+    quantizer = ORTQuantizer.from_pretrained(output_dir)
+    quantizer.quantize(
+        save_dir=output_dir,
+        quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    )
+    # The quantizer writes model_quantized.onnx; keep the name the loader expects
+    os.replace(os.path.join(output_dir, "model_quantized.onnx"), os.path.join(output_dir, ONNX_MODEL_FILE))
+
+
+if __name__ == "__main__":
+    import sys
+    export_quantized_model(sys.argv[1] if len(sys.argv) > 1 else "./data/models/all-MiniLM-L6-v2-int8")
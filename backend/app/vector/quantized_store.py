@@ -0,0 +1,442 @@
+"""
+Sidecar vector stores
+Keeps a scalar-quantized copy of each chatbot's embeddings so small collections
+can be searched with one NumPy pass instead of Chroma's HNSW index; larger ones
+are prefiltered on 1-bit sign codes by Hamming distance before the int8 rerank.
+A memory-mapped float16 copy gives exact reranking of approximate (IVF-PQ) candidates
+"""
+
+import os
+import json
+import struct
+import threading
+import logging
+from typing import List, Dict, Tuple, Callable
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Stores at least this large shortlist RERANK_FACTOR * limit candidates by Hamming distance first
+BINARY_PREFILTER_MIN_VECTORS = 20_000
+RERANK_FACTOR = 10
+
+# Row files are rewritten once superseded rows outnumber live ones (and this minimum)
+COMPACT_MIN_SUPERSEDED_ROWS = 1_000
+# Row file header: magic, embedding dim, committed row count
+_ROW_FILE_HEADER = struct.Struct("<4sIQ")
+
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def _popcount_rows(bits: np.ndarray) -> np.ndarray:
+    """Set bits per row of a packed uint8 matrix"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT_TABLE[bits].sum(axis=1, dtype=np.int32)
+
+def binary_quantize(embeddings: np.ndarray) -> np.ndarray:
+    """1 bit per dimension (sign), packed: 48 bytes for a 384-d vector"""
+    return np.packbits(np.asarray(embeddings) > 0, axis=1)
+
+def scalar_quantize_u8(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-vector min/max quantization: x ~= alpha * q8 + shift
+    Returns (uint8 codes, alpha, shift) with one alpha/shift per row
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    shift = embeddings.min(axis=1)
+    alpha = (embeddings.max(axis=1) - shift) / 255.0
+    # Constant rows would divide by zero; any alpha reconstructs them exactly
+    alpha = np.where(alpha > 0, alpha, 1.0).astype(np.float32)
+    q8 = np.round((embeddings - shift[:, None]) / alpha[:, None]).astype(np.uint8)
+    return q8, alpha, shift.astype(np.float32)
+
+
+class _RowFile:
+    """
+    Fixed-size binary rows appended to a data file, with one JSON id per line in a parallel
+    ids file naming each row. Re-added ids get a new row and their last row wins.
+    The header (dim, committed rows) is written last, so an append interrupted part-way
+    leaves only uncommitted rows and ids, which load truncates
+    """
+
+    def __init__(self, data_path: str, ids_path: str, magic: bytes, row_bytes: Callable[[int], int]):
+        self.data_path = data_path
+        self.ids_path = ids_path
+        self.magic = magic
+        self.row_bytes = row_bytes
+        # Id of every row in file order, superseded rows included
+        self.row_ids: List[str] = []
+        self.dim = 0
+
+    def append(self, ids: List[str], dim: int, data: bytes):
+        """Write rows past the committed ones, then their ids, then commit them in the header"""
+        if self.row_ids and dim != self.dim:
+            raise ValueError(f"rows of dim {dim} cannot be added to a file of dim {self.dim}")
+        committed = len(self.row_ids)
+
+        with open(self.data_path, 'r+b' if os.path.exists(self.data_path) else 'w+b') as f:
+            # Overwrites anything an interrupted append left past the committed rows
+            f.seek(_ROW_FILE_HEADER.size + committed * self.row_bytes(dim))
+            f.write(data)
+            f.truncate()
+            f.flush()
+            with open(self.ids_path, 'a') as ids_file:
+                ids_file.writelines(json.dumps(chunk_id) + "\n" for chunk_id in ids)
+            f.seek(0)
+            f.write(_ROW_FILE_HEADER.pack(self.magic, dim, committed + len(ids)))
+
+        self.dim = dim
+        self.row_ids.extend(ids)
+
+    def rewrite(self, ids: List[str], dim: int, data: bytes):
+        """
+        Replace both files through temp files. The ids file is replaced first: if the data
+        file is not replaced after it, the ids no longer cover the committed rows and load
+        rejects both instead of mismatching them
+        """
+        with open(f"{self.data_path}.tmp", 'wb') as f:
+            f.write(_ROW_FILE_HEADER.pack(self.magic, dim, len(ids)))
+            f.write(data)
+        with open(f"{self.ids_path}.tmp", 'w') as f:
+            f.writelines(json.dumps(chunk_id) + "\n" for chunk_id in ids)
+        os.replace(f"{self.ids_path}.tmp", self.ids_path)
+        os.replace(f"{self.data_path}.tmp", self.data_path)
+
+        self.dim = dim
+        self.row_ids = list(ids)
+
+    def load(self) -> bool:
+        """Read the committed row ids; False if there is no file. Raises ValueError if the files disagree"""
+        if not os.path.exists(self.data_path):
+            return False
+        with open(self.data_path, 'rb') as f:
+            magic, dim, committed = _ROW_FILE_HEADER.unpack(f.read(_ROW_FILE_HEADER.size))
+        data_size = _ROW_FILE_HEADER.size + committed * self.row_bytes(dim)
+        if magic != self.magic or os.path.getsize(self.data_path) < data_size:
+            raise ValueError("header does not match the file")
+
+        row_ids, ids_size = [], 0
+        if committed:
+            with open(self.ids_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    row_ids.append(json.loads(line))
+                    ids_size += len(line)
+                    if len(row_ids) == committed:
+                        break
+        if len(row_ids) < committed:
+            raise ValueError(f"{len(row_ids)} ids for {committed} rows")
+
+        # Drop what an interrupted append wrote past the committed rows
+        if os.path.getsize(self.data_path) > data_size:
+            os.truncate(self.data_path, data_size)
+        if os.path.exists(self.ids_path) and os.path.getsize(self.ids_path) > ids_size:
+            os.truncate(self.ids_path, ids_size)
+
+        self.dim = dim
+        self.row_ids = row_ids
+        return True
+
+    def needs_compaction(self, live_rows: int) -> bool:
+        return len(self.row_ids) - live_rows > max(COMPACT_MIN_SUPERSEDED_ROWS, live_rows)
+
+    def remove(self):
+        self.row_ids, self.dim = [], 0
+        for file_path in (self.data_path, self.ids_path):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+
+def _int8_row_dtype(dim: int) -> np.dtype:
+    """One int8 store row: codes, alpha, shift and packed sign bits"""
+    return np.dtype([
+        ("codes", np.uint8, (dim,)),
+        ("alpha", "<f4"),
+        ("shift", "<f4"),
+        ("bits", np.uint8, ((dim + 7) // 8,))
+    ])
+
+
+class QuantizedVectorStore:
+    """
+    uint8 codes plus per-row (alpha, shift) for one chatbot, appended to <path>.i8 with the
+    row ids in <path>.ids, and held compacted in memory.
+    Dot products use the A*Xq + S form: x . q = alpha * (q8 . q) + shift * sum(q)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.ids: List[str] = []
+        self.codes = np.empty((0, 0), dtype=np.uint8)
+        self.alpha = np.empty(0, dtype=np.float32)
+        self.shift = np.empty(0, dtype=np.float32)
+        self.bits = np.empty((0, 0), dtype=np.uint8)
+        self._file = _RowFile(f"{path}.i8", f"{path}.ids", b"I8VS", lambda dim: _int8_row_dtype(dim).itemsize)
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, ids: List[str], embeddings: np.ndarray):
+        """Add or replace vectors by id; only the new rows are written"""
+        q8, alpha, shift = scalar_quantize_u8(embeddings)
+        bits = binary_quantize(embeddings)
+
+        with self._lock:
+            self._file.append(list(ids), q8.shape[1], self._records(q8, alpha, shift, bits).tobytes())
+            self._add(ids, q8, alpha, shift, bits)
+            if self._file.needs_compaction(len(self.ids)):
+                records = self._records(self.codes, self.alpha, self.shift, self.bits)
+                self._file.rewrite(self.ids, self.codes.shape[1], records.tobytes())
+
+    def _add(self, ids: List[str], q8: np.ndarray, alpha: np.ndarray, shift: np.ndarray, bits: np.ndarray):
+        # Re-added ids replace their old rows
+        replaced = set(ids)
+        keep = [i for i, existing in enumerate(self.ids) if existing not in replaced]
+        if len(keep) < len(self.ids):
+            self.ids = [self.ids[i] for i in keep]
+            self.codes, self.alpha, self.shift = self.codes[keep], self.alpha[keep], self.shift[keep]
+            self.bits = self.bits[keep]
+
+        self.ids = self.ids + list(ids)
+        self.codes = np.concatenate([self.codes, q8]) if len(self.codes) else q8
+        self.alpha = np.concatenate([self.alpha, alpha])
+        self.shift = np.concatenate([self.shift, shift])
+        self.bits = np.concatenate([self.bits, bits]) if len(self.bits) else bits
+
+    def search(self, query_embeddings: np.ndarray, limit: int) -> Tuple[List[List[str]], np.ndarray]:
+        """Top-limit ids and inner products per query row, best first"""
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        with self._lock:
+            ids, codes, alpha, shift, bits = self.ids, self.codes, self.alpha, self.shift, self.bits
+
+        limit = min(limit, len(ids))
+        shortlist = RERANK_FACTOR * limit
+        top_ids, top_scores = [], []
+        for query in queries:
+            if len(ids) >= BINARY_PREFILTER_MIN_VECTORS and shortlist < len(ids):
+                # Hamming distance on sign bits: XOR + popcount over 48 bytes per row
+                hamming = _popcount_rows(np.bitwise_xor(bits, binary_quantize(query[None, :])))
+                candidates = np.argpartition(hamming, shortlist - 1)[:shortlist]
+                scores = (codes[candidates].astype(np.float32) @ query) * alpha[candidates] + shift[candidates] * query.sum()
+            else:
+                candidates = None
+                scores = (codes.astype(np.float32) @ query) * alpha + shift * query.sum()
+
+            best = np.argpartition(-scores, limit - 1)[:limit]
+            best = best[np.argsort(-scores[best])]
+            rows = best if candidates is None else candidates[best]
+
+            top_ids.append([ids[i] for i in rows])
+            top_scores.append(scores[best])
+
+        return top_ids, np.array(top_scores)
+
+    def delete(self):
+        with self._lock:
+            self._reset()
+
+    @staticmethod
+    def remove_files(path: str):
+        for file_path in (f"{path}.i8", f"{path}.ids", f"{path}.npz"):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def _reset(self):
+        self.ids = []
+        self.codes = np.empty((0, 0), dtype=np.uint8)
+        self.alpha = np.empty(0, dtype=np.float32)
+        self.shift = np.empty(0, dtype=np.float32)
+        self.bits = np.empty((0, 0), dtype=np.uint8)
+        self._file.remove()
+        # A legacy .npz is dropped as well
+        self.remove_files(self.path)
+
+    @staticmethod
+    def _records(q8: np.ndarray, alpha: np.ndarray, shift: np.ndarray, bits: np.ndarray) -> np.ndarray:
+        records = np.empty(len(q8), dtype=_int8_row_dtype(q8.shape[1]))
+        records["codes"], records["alpha"], records["shift"], records["bits"] = q8, alpha, shift, bits
+        return records
+
+    def _load(self):
+        try:
+            if not self._file.load():
+                self._load_npz()
+                return
+            records = np.fromfile(
+                self._file.data_path, dtype=_int8_row_dtype(self._file.dim),
+                count=len(self._file.row_ids), offset=_ROW_FILE_HEADER.size
+            )
+            # Last row per id wins, in the order the live rows were written
+            rows = {chunk_id: row for row, chunk_id in enumerate(self._file.row_ids)}
+            live = sorted(rows.values())
+            self.ids = [self._file.row_ids[row] for row in live]
+            records = records[live]
+            self.codes = np.ascontiguousarray(records["codes"])
+            self.alpha = np.ascontiguousarray(records["alpha"])
+            self.shift = np.ascontiguousarray(records["shift"])
+            self.bits = np.ascontiguousarray(records["bits"])
+        except Exception as e:
+            logger.warning(f"Discarding quantized vectors in {self._file.data_path}: {e}")
+            self._reset()
+
+    def _load_npz(self):
+        """Convert a store saved as one .npz by earlier versions to the row file"""
+        npz_path = f"{self.path}.npz"
+        if not os.path.exists(npz_path):
+            return
+        with np.load(npz_path) as saved:
+            ids = saved["ids"].tolist()
+            codes, alpha, shift = saved["codes"], saved["alpha"], saved["shift"]
+            if "bits" in saved:
+                bits = saved["bits"]
+            else:
+                # Written before sign codes existed; recover them from the int8 codes
+                bits = binary_quantize(codes * alpha[:, None] + shift[:, None])
+        if ids:
+            self._file.rewrite(ids, codes.shape[1], self._records(codes, alpha, shift, bits).tobytes())
+            self.ids, self.codes, self.alpha, self.shift, self.bits = ids, codes, alpha, shift, bits
+        os.remove(npz_path)
+
+
+class Float16VectorFile:
+    """
+    Raw float16 rows appended to <path>.f16 and read through np.memmap, with the row ids
+    in <path>.ids. Cold rows stay in the page cache, not in process memory
+    """
+
+    def __init__(self, path: str):
+        self._file = _RowFile(f"{path}.f16", f"{path}.ids", b"F16V", lambda dim: 2 * dim)
+        self.data_path = self._file.data_path
+        self.ids_path = self._file.ids_path
+        self.rows: Dict[str, int] = {}
+        self._matrix = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def row_ids(self) -> List[str]:
+        return self._file.row_ids
+
+    def add(self, ids: List[str], embeddings: np.ndarray):
+        """Append rows for ids, then commit the new row count in the header"""
+        vectors = np.asarray(embeddings, dtype=np.float16)
+
+        with self._lock:
+            if self.row_ids and vectors.shape[1] != self._file.dim:
+                logger.warning(f"Embedding size changed from {self._file.dim} to {vectors.shape[1]}, discarding {self.data_path}")
+                self._reset()
+            first_row = len(self.row_ids)
+            self._file.append(list(ids), vectors.shape[1], vectors.tobytes())
+            for row, chunk_id in enumerate(ids, first_row):
+                self.rows[chunk_id] = row
+            self._matrix = None
+
+            if self._file.needs_compaction(len(self.rows)):
+                self._compact()
+
+    def rerank(self, candidate_ids: List[List[str]], query_embeddings: np.ndarray, limit: int) -> Tuple[List[List[str]], List[np.ndarray]]:
+        """Exact inner products for each query's candidates; top-limit ids and scores, best first"""
+        with self._lock:
+            matrix = self._get_matrix()
+            rows_by_id = self.rows
+
+        # Rows appended after this snapshot was mapped are not visible to it
+        visible = 0 if matrix is None else matrix.shape[0]
+        top_ids, top_scores = [], []
+        for candidates, query in zip(candidate_ids, np.asarray(query_embeddings, dtype=np.float32)):
+            candidates = [chunk_id for chunk_id in candidates if rows_by_id.get(chunk_id, visible) < visible]
+            if not candidates:
+                top_ids.append([])
+                top_scores.append(np.empty(0, dtype=np.float32))
+                continue
+
+            # Only the candidates' pages are read from disk
+            scores = matrix[[rows_by_id[chunk_id] for chunk_id in candidates]].astype(np.float32) @ query
+            best = np.argsort(-scores)[:limit]
+            top_ids.append([candidates[i] for i in best])
+            top_scores.append(scores[best])
+
+        return top_ids, top_scores
+
+    def delete(self):
+        with self._lock:
+            self._reset()
+
+    @staticmethod
+    def remove_files(path: str):
+        for file_path in (f"{path}.f16", f"{path}.ids"):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def _reset(self):
+        self.rows, self._matrix = {}, None
+        self._file.remove()
+
+    def _get_matrix(self) -> np.ndarray:
+        if self._matrix is None and self.row_ids:
+            self._matrix = self._map(len(self.row_ids))
+        return self._matrix
+
+    def _map(self, rows: int) -> np.ndarray:
+        return np.memmap(
+            self.data_path, dtype=np.float16, mode='r', offset=_ROW_FILE_HEADER.size, shape=(rows, self._file.dim)
+        )
+
+    def _compact(self):
+        """Rewrite the files with only each id's live row"""
+        live = sorted(self.rows.values())
+        row_ids = [self.row_ids[row] for row in live]
+        matrix = self._map(len(self.row_ids))
+        data = np.ascontiguousarray(matrix[live]).tobytes()
+        del matrix
+        self._file.rewrite(row_ids, self._file.dim, data)
+
+        # A new dict, so rerank snapshots taken before the rewrite stay consistent
+        self.rows = {chunk_id: row for row, chunk_id in enumerate(row_ids)}
+        self._matrix = None
+
+    def _load(self):
+        try:
+            if self._file.load():
+                self.rows = {chunk_id: row for row, chunk_id in enumerate(self.row_ids)}
+        except Exception as e:
+            # Searches fall back to FAISS scores until the collection is re-ingested
+            logger.warning(f"Discarding float16 vectors in {self.data_path}: {e}")
+            self._reset()
+
+
+class QuantizedStoreRegistry:
+    """Lazily loaded per-chatbot stores under one directory"""
+
+    def __init__(self, data_dir: str, store_class=QuantizedVectorStore, extension: str = ""):
+        self.data_dir = data_dir
+        self.store_class = store_class
+        self.extension = extension
+        os.makedirs(data_dir, exist_ok=True)
+        self._stores: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def get(self, collection_name: str):
+        with self._lock:
+            store = self._stores.get(collection_name)
+            if store is None:
+                store = self.store_class(self._path(collection_name))
+                self._stores[collection_name] = store
+            return store
+
+    def drop(self, collection_name: str):
+        with self._lock:
+            store = self._stores.pop(collection_name, None)
+        if store is not None:
+            store.delete()
+        else:
+            self.store_class.remove_files(self._path(collection_name))
+
+    def _path(self, collection_name: str) -> str:
+        return os.path.join(self.data_dir, f"{collection_name}{self.extension}")
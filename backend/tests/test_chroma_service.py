@@ -0,0 +1,134 @@
+"""Tests for the Chroma vector service: embedding and the l2 -> inner product migration."""
+
+import numpy as np
+import pytest
+
+chromadb = pytest.importorskip("chromadb")
+pytest.importorskip("sentence_transformers")
+
+from chromadb.api.models.Collection import Collection
+
+from app.vector import chroma_service
+from app.vector.chroma_service import ChromaVectorService, _migration_names
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    # Skip loading the real model; tests that embed substitute their own
+    monkeypatch.setattr(chroma_service, "get_embedding_model", lambda: object())
+    return ChromaVectorService(data_dir=str(tmp_path / "chromadb"))
+
+
+class _UnnormalizedModel:
+    """Stands in for a model that has no Normalize layer and ignores normalize_embeddings"""
+
+    def encode(self, texts, **kwargs):
+        return np.arange(1, len(texts) * 4 + 1, dtype=np.float32).reshape(len(texts), 4) * 3
+
+
+def test_embeddings_are_unit_length(service):
+    service.embedding_model = _UnnormalizedModel()
+
+    embeddings = service.encode_cached(["first query", "second query"])
+
+    np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), 1.0, rtol=1e-3)
+
+
+def _add_l2_collection(service, name, chatbot_id="petstore", count=12):
+    collection = service.client.create_collection(name=name, metadata={"chatbot_id": chatbot_id, "hnsw:space": "l2"})
+    embeddings = np.random.default_rng(0).normal(size=(count, 8)).astype(np.float32)
+    collection.add(
+        ids=[f"chunk-{i}" for i in range(count)],
+        embeddings=embeddings.tolist(),
+        documents=[f"document {i}" for i in range(count)],
+        metadatas=[{"chunk_index": i} for i in range(count)]
+    )
+    return collection
+
+
+def _collection_names(service):
+    return sorted(getattr(collection, "name", collection) for collection in service.client.list_collections())
+
+
+def test_get_chatbot_collection_does_not_migrate(service):
+    _add_l2_collection(service, service.get_collection_name("petstore"))
+
+    collection = service.get_chatbot_collection("petstore")
+
+    assert collection.metadata["hnsw:space"] == "l2"
+    assert collection.count() == 12
+
+
+def test_migrate_to_inner_product_copies_everything(service, monkeypatch):
+    monkeypatch.setattr(chroma_service, "_MIGRATION_PAGE_SIZE", 5)
+    name = service.get_collection_name("petstore")
+    before = _add_l2_collection(service, name).get(include=["embeddings", "documents", "metadatas"])
+
+    assert service.migrate_to_inner_product("petstore")
+
+    migrated = service.client.get_collection(name)
+    after = migrated.get(ids=before["ids"], include=["embeddings", "documents", "metadatas"])
+    assert migrated.metadata["chatbot_id"] == "petstore"
+    assert migrated.metadata["hnsw:space"] == "ip"
+    assert after["ids"] == before["ids"]
+    assert after["documents"] == before["documents"]
+    assert after["metadatas"] == before["metadatas"]
+    np.testing.assert_allclose(after["embeddings"], before["embeddings"])
+    assert _collection_names(service) == [name]
+    # Already migrated: a second run is a no-op
+    assert service.migrate_to_inner_product("petstore")
+
+
+def test_failed_migration_keeps_the_original(service, monkeypatch):
+    name = service.get_collection_name("petstore")
+    _add_l2_collection(service, name)
+    new_name, _ = _migration_names(name)
+    modify = Collection.modify
+
+    def failing_modify(self, *args, **kwargs):
+        if kwargs.get("name") == name and self.name == new_name:
+            raise RuntimeError("disk full")
+        return modify(self, *args, **kwargs)
+
+    monkeypatch.setattr(Collection, "modify", failing_modify)
+
+    assert not service.migrate_to_inner_product("petstore")
+
+    monkeypatch.setattr(Collection, "modify", modify)
+    original = service.client.get_collection(name)
+    assert original.metadata["hnsw:space"] == "l2"
+    assert original.count() == 12
+    # The next run clears the partial copy and completes
+    assert service.migrate_to_inner_product("petstore")
+    assert service.client.get_collection(name).count() == 12
+    assert _collection_names(service) == [name]
+
+
+def test_migration_interrupted_between_renames_is_completed(service):
+    name = service.get_collection_name("petstore")
+    new_name, old_name = _migration_names(name)
+    original = _add_l2_collection(service, old_name)
+    page = original.get(include=["embeddings", "documents", "metadatas"])
+    copy = service.client.create_collection(name=new_name, metadata={"chatbot_id": "petstore", "hnsw:space": "ip"})
+    copy.add(ids=page["ids"], embeddings=page["embeddings"], documents=page["documents"], metadatas=page["metadatas"])
+
+    assert service.migrate_to_inner_product("petstore")
+
+    migrated = service.client.get_collection(name)
+    assert migrated.metadata["hnsw:space"] == "ip"
+    assert migrated.count() == 12
+    assert _collection_names(service) == [name]
+
+
+def test_migration_interrupted_with_partial_copy_restores_the_original(service):
+    name = service.get_collection_name("petstore")
+    new_name, old_name = _migration_names(name)
+    _add_l2_collection(service, old_name)
+    _add_l2_collection(service, new_name, count=3)
+
+    assert service.migrate_to_inner_product("petstore")
+
+    migrated = service.client.get_collection(name)
+    assert migrated.metadata["hnsw:space"] == "ip"
+    assert migrated.count() == 12
+    assert _collection_names(service) == [name]
@@ -0,0 +1,100 @@
+"""Tests for the FAISS IVF-PQ mirror manager."""
+
+import json
+import os
+import threading
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from app.vector import faiss_index
+from app.vector.faiss_index import FaissIndexManager, EMBEDDING_DIM
+
+
+def _unit_rows(count: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(count, EMBEDDING_DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class _FakeCollection:
+    def __init__(self, name, ids, vectors):
+        self.name, self.ids, self.vectors = name, ids, vectors
+
+    def get(self, include, limit, offset):
+        return {"ids": self.ids[offset:offset + limit], "embeddings": self.vectors[offset:offset + limit]}
+
+
+@pytest.fixture
+def small_index(monkeypatch):
+    # A tiny trainable index so builds run in milliseconds
+    monkeypatch.setattr(faiss_index, "FAISS_MIN_VECTORS", 50)
+    monkeypatch.setattr(faiss_index, "INDEX_FACTORY", "IVF4,Flat")
+
+
+def _build(manager, name, count=200):
+    vectors = _unit_rows(count)
+    ids = [f"chunk-{i}" for i in range(count)]
+    manager._building.add(name)
+    manager._build(_FakeCollection(name, ids, vectors))
+    return ids, vectors
+
+
+def test_build_applies_adds_queued_during_the_build(tmp_path, small_index):
+    manager = FaissIndexManager(str(tmp_path))
+    manager._building.add("bot")
+    extra = _unit_rows(3, seed=1)
+
+    assert manager.add("bot", ["new-0", "new-1", "chunk-0"], extra)
+    ids, _ = _build(manager, "bot")
+
+    index, mirrored = manager.get("bot")
+    assert mirrored == ids + ["new-0", "new-1"]
+    assert index.ntotal == len(mirrored)
+    top_ids, _ = manager.search("bot", extra[:1], 1)
+    assert top_ids == [["new-0"]]
+
+
+def test_adds_are_saved_atomically_and_debounced(tmp_path, small_index, monkeypatch):
+    monkeypatch.setattr(faiss_index, "SAVE_INTERVAL_SECONDS", 3600)
+    manager = FaissIndexManager(str(tmp_path))
+    ids, _ = _build(manager, "bot")
+
+    manager.add("bot", ["new-0"], _unit_rows(1, seed=1))
+
+    # Saved by the build, not again within the interval
+    assert FaissIndexManager(str(tmp_path)).get("bot")[1] == ids
+    manager.flush()
+    reloaded_index, reloaded_ids = FaissIndexManager(str(tmp_path)).get("bot")
+    assert reloaded_ids == ids + ["new-0"]
+    assert reloaded_index.ntotal == len(reloaded_ids)
+    assert os.listdir(tmp_path) == ["bot.npz"]
+
+
+def test_searching_one_collection_does_not_wait_on_another(tmp_path, small_index):
+    manager = FaissIndexManager(str(tmp_path))
+    _build(manager, "busy")
+    _build(manager, "idle")
+    done = threading.Event()
+
+    with manager._index_lock("busy"):
+        thread = threading.Thread(target=lambda: (manager.search("idle", _unit_rows(1), 3), done.set()))
+        thread.start()
+        assert done.wait(timeout=10)
+    thread.join()
+
+
+def test_legacy_index_files_are_converted_or_discarded(tmp_path):
+    index = faiss.IndexIDMap(faiss.IndexFlatIP(EMBEDDING_DIM))
+    index.add_with_ids(_unit_rows(3), np.arange(3, dtype=np.int64))
+    for name, ids in (("bot", ["a", "b", "c"]), ("stale", ["a", "b"])):
+        faiss.write_index(index, str(tmp_path / f"{name}.index"))
+        with open(tmp_path / f"{name}.ids.json", "w") as f:
+            json.dump(ids, f)
+
+    manager = FaissIndexManager(str(tmp_path))
+
+    assert manager.get("bot")[1] == ["a", "b", "c"]
+    assert manager.get("stale") is None
+    assert sorted(os.listdir(tmp_path)) == ["bot.npz"]
@@ -0,0 +1,85 @@
+"""Tests for the local LLM service and the training router."""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.llm.local_service import LocalLLMService, _model_family, TRAINING_SNIPPET_LENGTH
+
+
+@pytest.mark.parametrize("model_name, family", [
+    ("google/flan-t5-small", "t5"),
+    ("Qwen/Qwen2-0.5B-Instruct", "qwen"),
+    ("microsoft/phi-2", "phi"),
+    ("microsoft/DialoGPT-medium", "dialo"),
+    ("gpt2", "other"),
+])
+def test_model_family(model_name, family):
+    assert _model_family(model_name) == family
+
+
+def test_mock_mode_does_not_load_a_model():
+    service = LocalLLMService()
+
+    response = asyncio.run(service.generate_response("How do I authenticate?"))
+    responses = asyncio.run(service.generate_responses(["a", "b"]))
+
+    assert response.startswith("Mock response to: How do I authenticate?")
+    assert len(responses) == 2
+    assert service.model is None
+
+
+def test_training_example_truncates_content():
+    service = LocalLLMService()
+
+    example = service._create_training_example("Petstore", "z" * (TRAINING_SNIPPET_LENGTH + 100))
+
+    assert "about Petstore documentation" in example
+    assert example.count("z") == TRAINING_SNIPPET_LENGTH
+    assert example.endswith("...<|endoftext|>")
+
+
+def test_stream_response_raises_generate_errors():
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+
+    class FailingModel:
+        def generate(self, **kwargs):
+            raise RuntimeError("generation failed")
+
+    service = LocalLLMService()
+    service.mock_mode = False
+    service.model = FailingModel()
+    service._torch = torch
+    service._prompt_ids = lambda prompts: [[1, 2, 3]]
+
+    async def consume():
+        return [text async for text in service.stream_response("hello")]
+
+    with pytest.raises(RuntimeError, match="generation failed"):
+        asyncio.run(asyncio.wait_for(consume(), timeout=10))
+
+
+def test_training_router_serves_mock_mode():
+    from app.api.training import router
+
+    app = FastAPI()
+    app.include_router(router, prefix="/training")
+
+    with TestClient(app) as client:
+        info = client.get("/training/model/info")
+        generated = client.post("/training/model/generate", params={"prompt": "Hello"})
+
+    assert info.status_code == 200
+    assert info.json()["model_loaded"] is False
+    assert generated.status_code == 200
+    assert generated.json()["response"].startswith("Mock response to: Hello")
+
+
+def test_training_router_is_not_mounted_by_default(app):
+    paths = app.openapi()["paths"]
+
+    assert any(path.startswith("/api/v1/chat") for path in paths)
+    assert not any(path.startswith("/api/v1/training") for path in paths)
@@ -0,0 +1,93 @@
+"""Tests for document chunking."""
+
+import re
+import random
+import asyncio
+
+from app.config import settings
+from app.ingestion.processor import DocumentProcessor, _BreakIndex
+from app.models import Document, DocumentType
+from app.storage.local import LocalStorageService
+
+
+def _document(content: str, **kwargs) -> Document:
+    return Document(
+        id="petstore:users",
+        title="Users",
+        content=content,
+        url="https://petstore.example.com/docs/users",
+        doc_type=DocumentType.MARKDOWN,
+        **kwargs
+    )
+
+
+def test_chunks_share_document_fields_instead_of_copying_them():
+    document = _document("Use API keys for authentication. " * 100, metadata={"chatbot_id": "petstore-bot"})
+
+    chunks = asyncio.run(DocumentProcessor(chunk_size=500, chunk_overlap=100).chunk_document(document))
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk.document is document
+        assert chunk.metadata == {}
+        assert chunk.chunk_size == len(chunk.content)
+
+
+def test_reloaded_chunks_resolve_their_document(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_STORAGE_PATH", str(tmp_path))
+    storage = LocalStorageService()
+    document = _document("Returns a list of users.", metadata={"version": "1.0.0"})
+    chunks = asyncio.run(DocumentProcessor().chunk_document(document))
+    asyncio.run(storage.save_document(document))
+    asyncio.run(storage.save_chunks(chunks))
+
+    reloaded = asyncio.run(storage.load_chunks(document.id))
+
+    assert [chunk.content for chunk in reloaded] == [chunk.content for chunk in chunks]
+    assert reloaded[0].document.url == document.url
+    assert reloaded[0].document.doc_type == DocumentType.MARKDOWN
+    assert reloaded[0].document.metadata["version"] == "1.0.0"
+    assert reloaded[0].document is reloaded[-1].document
+
+
+def _reference_break(text: str, start: int, end: int) -> int:
+    """The per-window regex scan _BreakIndex replaced"""
+    for match in re.finditer(r'[.!?]\s+', text[start:end]):
+        return start + match.end()
+    for match in re.finditer(r'\n\s*\n', text[start:end]):
+        return start + match.end()
+    for i in range(end - 1, start - 1, -1):
+        if text[i].isspace():
+            return i
+    return end
+
+
+def test_break_index_matches_window_scan():
+    rng = random.Random(0)
+    for _ in range(5000):
+        text = "".join(rng.choice("ab. \n!?\t") for _ in range(rng.randint(1, 60)))
+        start = rng.randrange(len(text))
+        end = rng.randint(start + 1, len(text))
+
+        assert _BreakIndex(text).find(start, end) == _reference_break(text, start, end), (text, start, end)
+
+
+def test_split_text_prefers_sentence_breaks_and_overlaps():
+    text = " ".join(f"Sentence number {i} describes the users endpoint." for i in range(60))
+    processor = DocumentProcessor(chunk_size=300, chunk_overlap=60)
+
+    chunks = processor._split_text(text)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    # Every chunk after the first ends on a sentence boundary, except possibly the last
+    assert all(chunk.endswith(".") for chunk in chunks[1:-1])
+    # Consecutive chunks overlap and together cover the whole text
+    assert chunks[0] == text[:len(chunks[0])]
+    assert chunks[-1] == text[-len(chunks[-1]):]
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current[:20] in previous
+
+
+def test_split_text_short_text_is_one_chunk():
+    assert DocumentProcessor(chunk_size=100)._split_text("Returns a list of users.") == ["Returns a list of users."]
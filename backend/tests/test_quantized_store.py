@@ -0,0 +1,220 @@
+"""Tests for the int8 and float16 sidecar vector stores."""
+
+import os
+
+import numpy as np
+
+from app.vector import quantized_store
+from app.vector.quantized_store import (
+    Float16VectorFile, QuantizedVectorStore, _popcount_rows, binary_quantize, scalar_quantize_u8
+)
+
+
+def _unit_rows(count: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_scalar_quantize_u8_reconstructs_within_one_step():
+    vectors = np.vstack([_unit_rows(20), np.full((1, 16), 0.25, dtype=np.float32)])
+
+    q8, alpha, shift = scalar_quantize_u8(vectors)
+
+    reconstructed = q8 * alpha[:, None] + shift[:, None]
+    assert q8.dtype == np.uint8
+    assert np.all(np.abs(reconstructed - vectors) <= alpha[:, None] / 2 + 1e-6)
+    # A constant row has no range and reconstructs exactly
+    np.testing.assert_allclose(reconstructed[-1], vectors[-1])
+
+
+def test_int8_search_matches_float_inner_products(tmp_path):
+    vectors = _unit_rows(200)
+    ids = [f"chunk-{i}" for i in range(200)]
+    store = QuantizedVectorStore(str(tmp_path / "bot"))
+    store.add(ids, vectors)
+    queries = _unit_rows(3, seed=1)
+
+    top_ids, scores = store.search(queries, 5)
+
+    for query, got_ids, got_scores in zip(queries, top_ids, scores):
+        exact = vectors @ query
+        np.testing.assert_allclose(got_scores, exact[[ids.index(i) for i in got_ids]], atol=0.02)
+        assert got_ids[0] == ids[int(np.argmax(exact))]
+        assert list(got_scores) == sorted(got_scores, reverse=True)
+
+
+def test_int8_store_replaces_readded_ids_and_reloads(tmp_path):
+    vectors = _unit_rows(4)
+    store = QuantizedVectorStore(str(tmp_path / "bot"))
+    store.add(["a", "b", "c"], vectors[:3])
+    store.add(["b"], vectors[3:])
+
+    reloaded = QuantizedVectorStore(str(tmp_path / "bot"))
+
+    assert sorted(reloaded.ids) == ["a", "b", "c"]
+    top_ids, _ = reloaded.search(vectors[3:], 1)
+    assert top_ids == [["b"]]
+
+
+def test_int8_store_appends_only_new_rows(tmp_path):
+    vectors = _unit_rows(30)
+    store = QuantizedVectorStore(str(tmp_path / "bot"))
+    store.add([f"chunk-{i}" for i in range(20)], vectors[:20])
+    size = os.path.getsize(f"{store.path}.i8")
+
+    store.add([f"chunk-{i}" for i in range(20, 30)], vectors[20:])
+
+    row_bytes = (size - quantized_store._ROW_FILE_HEADER.size) // 20
+    assert os.path.getsize(f"{store.path}.i8") == size + 10 * row_bytes
+
+
+def test_int8_store_ignores_an_interrupted_add(tmp_path):
+    vectors = _unit_rows(5)
+    store = QuantizedVectorStore(str(tmp_path / "bot"))
+    store.add(["a", "b", "c"], vectors[:3])
+    # Rows and part of the ids written, header never updated
+    with open(f"{store.path}.i8", "ab") as f:
+        f.write(b"\x07" * 100)
+    with open(f"{store.path}.ids", "a") as f:
+        f.write('"d"\n"e')
+
+    reloaded = QuantizedVectorStore(str(tmp_path / "bot"))
+
+    assert reloaded.ids == ["a", "b", "c"]
+    reloaded.add(["d"], vectors[3:4])
+    assert QuantizedVectorStore(str(tmp_path / "bot")).search(vectors[3:4], 1)[0] == [["d"]]
+
+
+def test_int8_store_compacts_superseded_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(quantized_store, "COMPACT_MIN_SUPERSEDED_ROWS", 2)
+    vectors = _unit_rows(3)
+    store = QuantizedVectorStore(str(tmp_path / "bot"))
+    store.add(["a", "b"], vectors[:2])
+    store.add(["a", "b"], vectors[1:3])
+    store.add(["a", "b"], vectors[1:3])
+
+    assert store._file.row_ids == ["a", "b"]
+    reloaded = QuantizedVectorStore(str(tmp_path / "bot"))
+    assert reloaded.search(vectors[2:3], 2)[0] == [["b", "a"]]
+
+
+def test_int8_store_converts_a_legacy_npz(tmp_path):
+    vectors = _unit_rows(3)
+    q8, alpha, shift = scalar_quantize_u8(vectors)
+    path = str(tmp_path / "bot")
+    np.savez(f"{path}.npz", ids=np.array(["a", "b", "c"]), codes=q8, alpha=alpha, shift=shift)
+
+    store = QuantizedVectorStore(path)
+
+    assert store.search(vectors[1:2], 1)[0] == [["b"]]
+    assert not os.path.exists(f"{path}.npz")
+    assert QuantizedVectorStore(path).ids == ["a", "b", "c"]
+
+
+def test_binary_codes_give_hamming_distance():
+    vectors = _unit_rows(10, dim=384)
+
+    bits = binary_quantize(vectors)
+    hamming = _popcount_rows(np.bitwise_xor(bits, bits[:1]))
+
+    assert bits.shape == (10, 48)
+    expected = ((vectors > 0) != (vectors[:1] > 0)).sum(axis=1)
+    np.testing.assert_array_equal(hamming, expected)
+
+
+def test_binary_prefilter_keeps_nearest_neighbours(tmp_path, monkeypatch):
+    monkeypatch.setattr(quantized_store, "BINARY_PREFILTER_MIN_VECTORS", 100)
+    vectors = _unit_rows(2000, dim=64)
+    ids = [f"chunk-{i}" for i in range(2000)]
+    store = QuantizedVectorStore(str(tmp_path / "bot"))
+    store.add(ids, vectors)
+    # Paraphrase-like queries: close to a stored vector, so most sign bits agree
+    targets = [7, 500, 1999]
+    noise = np.random.default_rng(2).normal(scale=0.05, size=(3, 64)).astype(np.float32)
+    queries = vectors[targets] + noise
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    top_ids, scores = store.search(queries, 3)
+
+    for target, query, got_ids, got_scores in zip(targets, queries, top_ids, scores):
+        assert got_ids[0] == ids[target]
+        np.testing.assert_allclose(got_scores, vectors[[ids.index(i) for i in got_ids]] @ query, atol=0.02)
+
+
+def test_float16_rerank_orders_candidates_exactly(tmp_path):
+    vectors = _unit_rows(50)
+    ids = [f"chunk-{i}" for i in range(50)]
+    store = Float16VectorFile(str(tmp_path / "bot"))
+    store.add(ids[:30], vectors[:30])
+    store.add(ids[30:], vectors[30:])
+    queries = _unit_rows(2, seed=1)
+
+    top_ids, scores = store.rerank([ids, ids[10:20] + ["unknown"]], queries, 5)
+
+    for query, candidates, got_ids, got_scores in zip(queries, [ids, ids[10:20]], top_ids, scores):
+        exact = vectors[[ids.index(c) for c in candidates]] @ query
+        best = np.argsort(-exact)[:5]
+        assert got_ids == [candidates[i] for i in best]
+        np.testing.assert_allclose(got_scores, exact[best], atol=2e-3)
+
+
+def test_float16_file_reloads_and_readded_ids_win(tmp_path):
+    vectors = _unit_rows(4)
+    store = Float16VectorFile(str(tmp_path / "bot"))
+    store.add(["a", "b", "c"], vectors[:3])
+    store.add(["b"], vectors[3:])
+
+    reloaded = Float16VectorFile(str(tmp_path / "bot"))
+
+    assert len(reloaded) == 3
+    top_ids, scores = reloaded.rerank([["b"]], vectors[3:], 1)
+    assert top_ids == [["b"]]
+    np.testing.assert_allclose(scores[0], [1.0], atol=2e-3)
+
+
+def test_float16_file_ignores_an_interrupted_add(tmp_path):
+    vectors = _unit_rows(5)
+    store = Float16VectorFile(str(tmp_path / "bot"))
+    store.add(["a", "b", "c"], vectors[:3])
+    committed = (os.path.getsize(store.data_path), os.path.getsize(store.ids_path))
+    # Rows and part of the ids written, header never updated
+    with open(store.data_path, "ab") as f:
+        f.write(vectors[3:].astype(np.float16).tobytes())
+    with open(store.ids_path, "a") as f:
+        f.write('"d"\n"e')
+
+    reloaded = Float16VectorFile(str(tmp_path / "bot"))
+
+    assert len(reloaded) == 3
+    assert (os.path.getsize(reloaded.data_path), os.path.getsize(reloaded.ids_path)) == committed
+    reloaded.add(["d"], vectors[3:4])
+    assert len(Float16VectorFile(str(tmp_path / "bot"))) == 4
+
+
+def test_float16_file_discards_ids_that_do_not_cover_the_rows(tmp_path):
+    store = Float16VectorFile(str(tmp_path / "bot"))
+    store.add(["a", "b", "c"], _unit_rows(3))
+    with open(store.ids_path, "w") as f:
+        f.write('"a"\n')
+
+    reloaded = Float16VectorFile(str(tmp_path / "bot"))
+
+    assert len(reloaded) == 0
+    assert not os.path.exists(reloaded.data_path)
+
+
+def test_float16_file_compacts_superseded_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(quantized_store, "COMPACT_MIN_SUPERSEDED_ROWS", 2)
+    vectors = _unit_rows(3)
+    store = Float16VectorFile(str(tmp_path / "bot"))
+    store.add(["a", "b"], vectors[:2])
+    store.add(["a", "b"], vectors[1:3])
+    assert len(store.row_ids) == 4
+    # Superseded rows now outnumber live ones
+    store.add(["a", "b"], vectors[1:3])
+
+    assert store.row_ids == ["a", "b"]
+    reloaded = Float16VectorFile(str(tmp_path / "bot"))
+    assert reloaded.row_ids == ["a", "b"]
+    top_ids, _ = reloaded.rerank([["a", "b"]], vectors[2:3], 2)
+    assert top_ids == [["b", "a"]]
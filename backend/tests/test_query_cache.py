@@ -0,0 +1,72 @@
+"""Tests for the RAG query and semantic caches."""
+
+import numpy as np
+
+from app.rag.query_cache import QueryCache, SemanticCache
+
+
+def _unit(*values) -> np.ndarray:
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_semantic_cache_matches_paraphrases_in_the_same_session():
+    cache = SemanticCache(threshold=0.95)
+    cache.put("bot", "session-a", _unit(1, 0, 0), {"response": "Use an API key."})
+
+    assert cache.get("bot", "session-a", _unit(1, 0.05, 0)) == {"response": "Use an API key."}
+    assert cache.get("bot", "session-a", _unit(0, 1, 0)) is None
+
+
+def test_semantic_cache_is_scoped_to_chatbot_and_session():
+    cache = SemanticCache(threshold=0.95)
+    cache.put("bot", "session-a", _unit(1, 0, 0), {"response": "From session A's conversation."})
+
+    assert cache.get("bot", "session-b", _unit(1, 0, 0)) is None
+    assert cache.get("other-bot", "session-a", _unit(1, 0, 0)) is None
+
+
+def test_semantic_cache_returns_the_closest_entry():
+    cache = SemanticCache(threshold=0.9)
+    cache.put("bot", "session-a", _unit(1, 0.2, 0), {"response": "near"})
+    cache.put("bot", "session-a", _unit(1, 0.4, 0), {"response": "far"})
+
+    assert cache.get("bot", "session-a", _unit(1, 0.15, 0)) == {"response": "near"}
+
+
+def test_semantic_cache_expires_and_invalidates_entries():
+    expired = SemanticCache(ttl=-1)
+    expired.put("bot", "session-a", _unit(1, 0, 0), {"response": "stale"})
+    assert expired.get("bot", "session-a", _unit(1, 0, 0)) is None
+
+    cache = SemanticCache()
+    cache.put("bot", "session-a", _unit(1, 0, 0), {"response": "a"})
+    cache.put("bot", "session-b", _unit(1, 0, 0), {"response": "b"})
+    cache.put("other-bot", "session-a", _unit(1, 0, 0), {"response": "c"})
+    cache.invalidate("bot")
+
+    assert cache.get("bot", "session-a", _unit(1, 0, 0)) is None
+    assert cache.get("bot", "session-b", _unit(1, 0, 0)) is None
+    assert cache.get("other-bot", "session-a", _unit(1, 0, 0)) == {"response": "c"}
+
+
+def test_semantic_cache_evicts_least_recently_used():
+    cache = SemanticCache(max_size=2)
+    cache.put("bot", "session-a", _unit(1, 0, 0), {"response": "x"})
+    cache.put("bot", "session-a", _unit(0, 1, 0), {"response": "y"})
+    cache.get("bot", "session-a", _unit(1, 0, 0))
+    cache.put("bot", "session-a", _unit(0, 0, 1), {"response": "z"})
+
+    assert cache.get("bot", "session-a", _unit(1, 0, 0)) == {"response": "x"}
+    assert cache.get("bot", "session-a", _unit(0, 1, 0)) is None
+
+
+def test_query_cache_invalidates_one_chatbot():
+    cache = QueryCache()
+    cache.put("bot", "auth", 5, [{"content": "a"}])
+    cache.put("other-bot", "auth", 5, [{"content": "b"}])
+
+    cache.invalidate("bot")
+
+    assert cache.get("bot", "auth", 5) is None
+    assert cache.get("other-bot", "auth", 5) == [{"content": "b"}]
@@ -0,0 +1,58 @@
+"""Tests for the RAG pipeline's use of the vector service and caches."""
+
+import asyncio
+import functools
+
+import numpy as np
+
+from app.rag import service as rag_service
+from app.rag.query_cache import QueryCache, SemanticCache
+
+
+class _FakeVectorService:
+    def __init__(self):
+        self.encoded = []
+        self.embedding_searches = 0
+
+    def encode_cached(self, texts):
+        self.encoded.append(list(texts))
+        return np.tile(np.array([[0.6, 0.8, 0.0]], dtype=np.float32), (len(texts), 1))
+
+    def search_similar_with_embedding(self, chatbot_id, embedding, limit=5):
+        self.embedding_searches += 1
+        return [{
+            "content": "Authenticate with an API key in the X-API-Key header.",
+            "metadata": {"title": "Auth", "source_url": "https://petstore.example.com/auth"},
+            "similarity_score": 0.9
+        }]
+
+    def search_similar(self, chatbot_id, query, limit=5):
+        raise AssertionError("the query was embedded again")
+
+
+class _FakeLLMService:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_response(self, prompt, chatbot_id, session_id, **kwargs):
+        self.calls += 1
+        return "Send your API key in the X-API-Key header."
+
+
+def test_query_is_embedded_once_for_cache_and_search(monkeypatch):
+    vector_service, llm_service = _FakeVectorService(), _FakeLLMService()
+    monkeypatch.setattr(rag_service, "get_chroma_service", lambda: vector_service)
+    monkeypatch.setattr(rag_service, "get_gemini_llm_service", lambda: llm_service)
+    monkeypatch.setattr(rag_service, "get_query_cache", QueryCache)
+    monkeypatch.setattr(rag_service, "get_semantic_cache", SemanticCache)
+    monkeypatch.setattr(rag_service, "_token_encoding", functools.lru_cache(maxsize=1)(lambda: None))
+    service = rag_service.RAGService()
+    query = "How do I authenticate API requests?"
+
+    first = asyncio.run(service.generate_response("petstore", query, session_id="session-a"))
+    second = asyncio.run(service.generate_response("petstore", query, session_id="session-a"))
+
+    assert first["context_used"] and second["response"] == first["response"]
+    assert vector_service.encoded == [[query], [query]]
+    assert vector_service.embedding_searches == 1
+    assert llm_service.calls == 1
@@ -0,0 +1,38 @@
+"""Tests for tool registration."""
+
+import subprocess
+import sys
+import threading
+
+import app.tools as tools
+
+
+def test_importing_tools_does_not_import_tool_modules():
+    # A fresh interpreter: this test process may already have run discovery
+    code = "import sys, app.tools; print(any(m.startswith('app.tools.') for m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "False"
+
+
+def test_tools_are_discovered_once_on_first_use(monkeypatch):
+    calls = []
+    discover = tools._discover_tools
+
+    def counting_discover():
+        calls.append(1)
+        discover()
+
+    monkeypatch.setattr(tools, "_discovered", False)
+    monkeypatch.setattr(tools, "_discover_tools", counting_discover)
+
+    threads = [threading.Thread(target=tools.get_all_tool_declarations) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    names = {declaration["name"] for declaration in tools.get_all_tool_declarations()}
+
+    assert calls == [1]
+    assert {"get_api_version_info", "search_documentation"} <= names
+    assert tools.get_tool_function("get_api_version_info") is not None